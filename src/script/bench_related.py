@@ -0,0 +1,117 @@
+"""関連研究インデックス（MinHash/LSH）のベンチマークスクリプト
+
+このスクリプトは以下を計測します:
+1. インデックス構築時間・保存した署名からの読み込み時間
+2. 1件あたりの近傍検索時間（LSH / 総当たり）と、LSHの候補が全件に占める割合
+3. 総当たりのJaccard係数に対するrecall@k
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from seedsearch.loader import DataLoader
+from seedsearch.related import RelatedIndex
+
+
+def brute_force_top(shingle_sets: list[set[str]], pos: int, top: int) -> list[int]:
+    """総当たりでJaccard係数の高い研究課題を取得
+
+    Args:
+        shingle_sets: 全研究課題のshingle集合
+        pos: 基準となる研究課題の行番号
+        top: 取得する件数
+
+    Returns:
+        Jaccard係数の降順に並べた行番号のリスト
+    """
+    base = shingle_sets[pos]
+    scores = []
+    for other_pos, other in enumerate(shingle_sets):
+        if other_pos == pos or not other:
+            continue
+        union = len(base | other)
+        if union:
+            scores.append((len(base & other) / union, other_pos))
+    scores.sort(key=lambda x: (-x[0], x[1]))
+    return [other_pos for score, other_pos in scores[:top] if score > 0]
+
+
+def run_benchmark(csv_path: Path | None, top: int, samples: int, seed: int) -> None:
+    """ベンチマークを実行して結果を表示
+
+    Args:
+        csv_path: CSVファイルのパス（Noneの場合はパッケージ内のデータ）
+        top: recallを計測する近傍数k
+        samples: 計測に使う基準研究課題の数
+        seed: 基準研究課題を選ぶ乱数シード
+    """
+    data = DataLoader(csv_path).load()
+    print(f"データ: {len(data)} 件")
+
+    start = time.perf_counter()
+    index = RelatedIndex(data)
+    build_time = time.perf_counter() - start
+    print(f"インデックス構築時間: {build_time:.3f} 秒")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index.save(Path(tmp_dir))
+        start = time.perf_counter()
+        RelatedIndex.load(Path(tmp_dir))
+        load_time = time.perf_counter() - start
+    print(f"保存した署名からの読み込み時間: {load_time:.3f} 秒")
+
+    shingle_sets = [index.shingles(row) for _, row in data.iterrows()]
+    rng = np.random.default_rng(seed)
+    targets = rng.choice(len(data), size=min(samples, len(data)), replace=False)
+
+    lsh_time = 0.0
+    brute_time = 0.0
+    recalls = []
+    candidate_counts = []
+    for pos in targets:
+        pos = int(pos)
+
+        start = time.perf_counter()
+        approx = [p for p, _ in index.related(pos, top=top)]
+        lsh_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        exact = brute_force_top(shingle_sets, pos, top)
+        brute_time += time.perf_counter() - start
+
+        candidate_counts.append(len(index.candidates(pos)))
+        if exact:
+            recalls.append(len(set(approx) & set(exact)) / len(exact))
+
+    print(f"\n=== 近傍検索（{len(targets)} 件, top={top}） ===")
+    print(f"LSH:    平均 {lsh_time / len(targets) * 1000:.2f} ms/件")
+    print(f"総当たり: 平均 {brute_time / len(targets) * 1000:.2f} ms/件")
+    mean_candidates = np.mean(candidate_counts)
+    print(
+        f"平均候補数: {mean_candidates:.1f} 件 / {len(data)} 件"
+        f"（{mean_candidates / len(data):.1%}）"
+    )
+    if recalls:
+        print(f"recall@{top}: {np.mean(recalls):.3f}")
+    else:
+        print(f"recall@{top}: 計測対象なし")
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description="関連研究インデックスのベンチマーク")
+    parser.add_argument("--csv", type=Path, default=None, help="CSVファイルのパス")
+    parser.add_argument("--top", type=int, default=10, help="recallを計測する近傍数")
+    parser.add_argument("--samples", type=int, default=100, help="計測に使う研究課題の数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args()
+
+    run_benchmark(args.csv, args.top, args.samples, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,38 +2,163 @@
 
 import click
 from pathlib import Path
+from typing import Optional
 
 from .loader import DataLoader
 from .search import ResearchSearcher
 from .display import ResultDisplay
+from .export import BackgroundWriter
+from .related import RelatedIndex
+from .reload import ReloadingSearcher
+from .metrics import QueryMetrics, summarize, to_prometheus
 
 
 @click.group()
 @click.version_option(version="0.1.0")
-def cli():
+@click.option(
+    "--metrics",
+    is_flag=True,
+    help="検索の実行記録を保存する（環境変数 SEEDSEARCH_METRICS=1 でも有効化）"
+)
+def cli(metrics: bool):
     """福岡工業大学の研究シーズ検索ツール"""
     pass
 
 
+def _query_metrics() -> Optional[QueryMetrics]:
+    """
+    実行記録が有効な場合は記録先を返す
+
+    Returns:
+        QueryMetrics: 記録先、無効な場合はNone
+    """
+    ctx = click.get_current_context()
+    if ctx.find_root().params.get("metrics") or QueryMetrics.enabled_by_env():
+        return QueryMetrics()
+    return None
+
+
+def _load_store(loader: Optional[DataLoader] = None):
+    """
+    データファイルの行ストアを開く
+
+    キャッシュに行ストアを作成できない場合は、原因を警告として表示し、
+    CSVから読み込んだデータで続行する
+
+    Args:
+        loader: データローダー（Noneの場合はデフォルトのデータファイル）
+
+    Returns:
+        RowStore: 行ストア（作成できない場合は MemoryStore）
+
+    Raises:
+        FileNotFoundError: データファイルが見つからない場合
+    """
+    if loader is None:
+        loader = DataLoader()
+    store = loader.load_store()
+    _warn_cache_error(loader)
+    return store
+
+
+def _warn_cache_error(loader: DataLoader) -> None:
+    """行ストアを作成できずにCSVを直接読み込んだ場合は原因を警告として表示"""
+    if loader.cache_error is not None:
+        click.echo(
+            "警告: キャッシュに行ストアを作成できないため、CSVを直接読み込みます\n"
+            f"原因: {loader.cache_error}",
+            err=True,
+        )
+
+
+def _prepare_indexes(store, exact: bool, filtered: bool) -> Optional[Path]:
+    """
+    完全一致検索・範囲検索を行う場合は行ストアに保存したインデックスを用意
+
+    Args:
+        store: 行ストア
+        exact: 完全一致検索を行う場合はTrue
+        filtered: 研究期間・総配分額による絞り込み・並べ替えを行う場合はTrue
+
+    Returns:
+        Path: インデックスのディレクトリ、使わない場合や保存できない場合はNone
+    """
+    if not (exact or filtered):
+        return None
+    return ResearchSearcher.prepare_indexes(store)
+
+
+def _search_columns(field: str, filtered: bool, index_dir: Optional[Path]) -> list:
+    """
+    検索のために行ストアからデコードする列を取得
+
+    保存済みの範囲検索のインデックスを使う場合は、研究期間・総配分額の列はデコードしない
+
+    Args:
+        field: 検索対象フィールド
+        filtered: 研究期間・総配分額による絞り込み・並べ替えを行う場合はTrue
+        index_dir: _prepare_indexes() で用意したインデックスのディレクトリ
+
+    Returns:
+        list: 列名のリスト
+    """
+    range_saved = index_dir is not None and (index_dir / "range").exists()
+    return ResearchSearcher.columns_for(field, filtered and not range_saved)
+
+
+def _search_options(func):
+    """search / export で共通の検索条件オプションを追加するデコレーター"""
+    options = [
+        click.option(
+            "--exact", "-e",
+            is_flag=True,
+            help="完全一致検索（デフォルトは部分一致）"
+        ),
+        click.option(
+            "--field", "-f",
+            type=click.Choice(["all", "title", "keyword", "overview", "researcher"]),
+            default="all",
+            help="検索対象フィールド"
+        ),
+        click.option(
+            "--operator", "-op",
+            type=click.Choice(["and", "or"]),
+            default="and",
+            help="複数ワードの検索方法（and: すべて含む / or: いずれか含む、デフォルトはand）"
+        ),
+        click.option(
+            "--year-from",
+            type=int,
+            default=None,
+            help="この年度以降に実施中の研究に絞り込む"
+        ),
+        click.option(
+            "--year-to",
+            type=int,
+            default=None,
+            help="この年度までに開始した研究に絞り込む"
+        ),
+        click.option(
+            "--min-budget",
+            type=click.IntRange(min=0),
+            default=None,
+            help="総配分額（円）の下限で絞り込む"
+        ),
+        click.option(
+            "--sort",
+            type=click.Choice(list(ResearchSearcher.SORT_KEYS.keys())),
+            default=None,
+            help="並べ替え（budget: 総配分額の多い順）"
+        ),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
 @cli.command()
 @click.argument("query")
-@click.option(
-    "--exact", "-e",
-    is_flag=True,
-    help="完全一致検索（デフォルトは部分一致）"
-)
-@click.option(
-    "--field", "-f",
-    type=click.Choice(["all", "title", "keyword", "overview", "researcher"]),
-    default="all",
-    help="検索対象フィールド"
-)
-@click.option(
-    "--operator", "-op",
-    type=click.Choice(["and", "or"]),
-    default="and",
-    help="複数ワードの検索方法（and: すべて含む / or: いずれか含む、デフォルトはand）"
-)
+@_search_options
 @click.option(
     "--limit", "-l",
     type=int,
@@ -46,7 +171,18 @@ def cli():
     default="table",
     help="出力形式（table/json/csv）"
 )
-def search(query: str, exact: bool, field: str, operator: str, limit: int, output: str):
+def search(
+    query: str,
+    exact: bool,
+    field: str,
+    operator: str,
+    limit: int,
+    output: str,
+    year_from: int,
+    year_to: int,
+    min_budget: int,
+    sort: str,
+):
     """研究シーズを検索
 
     \b
@@ -56,33 +192,175 @@ def search(query: str, exact: bool, field: str, operator: str, limit: int, outpu
       seedsearch search "AI ロボット" --operator or  # OR検索（いずれか含む）
       seedsearch search "ロボット" --field keyword
       seedsearch search "松尾" --field researcher --limit 10
+      seedsearch search "AI" --year-from 2020 --year-to 2023 --min-budget 10000000 --sort budget
     """
     try:
-        # データを読み込み
-        loader = DataLoader()
-        data = loader.load()
+        # 研究期間・総配分額の条件がある場合はその列も読み込む
+        filtered = ResearchSearcher.is_filtered(year_from, year_to, min_budget, sort)
+        list_columns = list(ResultDisplay.LIST_COLUMNS)
+        if filtered:
+            list_columns += ResearchSearcher.RANGE_COLUMNS
+
+        # データを読み込み（検索対象の列だけをデコード）
+        store = _load_store()
+        index_dir = _prepare_indexes(store, exact, filtered)
+        data = store.frame(_search_columns(field, filtered, index_dir))
 
         # 検索を実行
-        searcher = ResearchSearcher(data)
-        results = searcher.search(query, exact=exact, field=field, operator=operator)
+        searcher = ResearchSearcher(data, store=store, metrics=_query_metrics())
+        if index_dir is not None:
+            searcher.load_indexes(index_dir)
+        results = searcher.search(
+            query,
+            exact=exact,
+            field=field,
+            operator=operator,
+            year_from=year_from,
+            year_to=year_to,
+            min_budget=min_budget,
+            sort=sort,
+        )
 
         # limit適用
         if limit:
             results = results.head(limit)
 
-        # 結果を表示
+        # 結果を表示（表示する行・列だけを行ストアからデコード）
         display = ResultDisplay()
         if output == "json":
-            display.output_json(results)
+            display.output_json(store.take(results.index))
         elif output == "csv":
-            display.output_csv(results)
+            display.output_csv(store.take(results.index))
         else:  # table
             # 複数ワード検索の場合、キーワードをリスト化してハイライト
             search_keywords = [kw.strip() for kw in query.split() if kw.strip()]
-            display.display_list(results, limit=limit, search_keywords=search_keywords)
+            display.display_list(
+                store.take(results.index, list_columns),
+                limit=limit,
+                search_keywords=search_keywords,
+            )
             # サマリーも表示
             if not results.empty and len(results) > 5:
-                display.display_summary(results)
+                display.display_summary(store.take(results.index, ["研究種目"]))
+
+    except FileNotFoundError as e:
+        click.echo(f"エラー: {e}", err=True)
+        raise click.Abort()
+    except Exception as e:
+        click.echo(f"エラーが発生しました: {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.argument("query")
+@click.argument("output_path", type=click.Path(dir_okay=False, path_type=Path))
+@click.option(
+    "--format", "-F", "fmt",
+    type=click.Choice(list(BackgroundWriter.COMPRESSIONS.keys())),
+    default=None,
+    help="出力形式（parquet/jsonl/csv、省略時は拡張子から判定）"
+)
+@click.option(
+    "--compression", "-c",
+    type=click.Choice(["zstd", "snappy", "gzip", "none"]),
+    default=None,
+    help="圧縮方式（省略時はparquet: zstd、jsonl/csv: 拡張子が .gz ならgzip、それ以外は圧縮なし）"
+)
+@click.option(
+    "--columns", "-C",
+    default=None,
+    help="出力する列名（カンマ区切り、省略時は全列）"
+)
+@_search_options
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    help="1回に書き出す行数"
+)
+def export(
+    query: str,
+    output_path: Path,
+    fmt: str,
+    compression: str,
+    columns: str,
+    exact: bool,
+    field: str,
+    operator: str,
+    year_from: int,
+    year_to: int,
+    min_budget: int,
+    sort: str,
+    chunk_size: int,
+):
+    """検索結果をファイルに書き出す
+
+    \b
+    例:
+      seedsearch export "AI" ai.csv.gz
+      seedsearch export "AI" ai.parquet --columns 研究課題名,研究代表者,キーワード
+      seedsearch export "" all.jsonl.gz --year-from 2020 --sort budget
+    """
+    try:
+        # 出力形式を拡張子から判定
+        if fmt is None:
+            suffixes = [suffix.lower() for suffix in output_path.suffixes]
+            if ".parquet" in suffixes:
+                fmt = "parquet"
+            elif ".jsonl" in suffixes or ".json" in suffixes:
+                fmt = "jsonl"
+            else:
+                fmt = "csv"
+
+        store = _load_store()
+
+        # 出力する列を確認
+        if columns:
+            export_columns = [col.strip() for col in columns.split(",") if col.strip()]
+            unknown = [col for col in export_columns if col not in store.columns]
+            if unknown:
+                raise ValueError(
+                    f"存在しない列が指定されました: {', '.join(unknown)}\n"
+                    f"使用可能な列: {', '.join(store.columns)}"
+                )
+        else:
+            export_columns = list(store.columns)
+
+        # 検索を実行（検索対象の列だけをデコード）
+        filtered = ResearchSearcher.is_filtered(year_from, year_to, min_budget, sort)
+        index_dir = _prepare_indexes(store, exact, filtered)
+
+        searcher = ResearchSearcher(
+            store.frame(_search_columns(field, filtered, index_dir)),
+            store=store,
+            metrics=_query_metrics(),
+        )
+        if index_dir is not None:
+            searcher.load_indexes(index_dir)
+        results = searcher.search(
+            query,
+            exact=exact,
+            field=field,
+            operator=operator,
+            year_from=year_from,
+            year_to=year_to,
+            min_budget=min_budget,
+            sort=sort,
+        )
+
+        # デコードしたチャンクを書き込みスレッドに渡し、圧縮・書き込みと並行して次を作成
+        positions = results.index
+        with BackgroundWriter(output_path, fmt, compression) as writer:
+            for start in range(0, max(len(positions), 1), chunk_size):
+                writer.write(store.take(positions[start:start + chunk_size], export_columns))
+        stats = writer.close()
+
+        click.echo(f"\n{stats.rows}件を書き出しました: {output_path}")
+        click.echo(f"形式: {fmt}（圧縮: {writer.compression}）")
+        click.echo(
+            f"時間: {stats.elapsed:.2f}秒 / {stats.rows_per_sec:,.0f}行/秒 / "
+            f"{stats.bytes_written / 1024 / 1024:.2f}MB ({stats.mb_per_sec:.2f}MB/秒)\n"
+        )
 
     except FileNotFoundError as e:
         click.echo(f"エラー: {e}", err=True)
@@ -102,12 +380,11 @@ def show(research_id: str):
       seedsearch show 25KJ2239
     """
     try:
-        # データを読み込み
-        loader = DataLoader()
-        data = loader.load()
+        # 行ストアを開く（全行の読み込みは行わない）
+        store = _load_store()
 
         # 研究課題を取得
-        searcher = ResearchSearcher(data)
+        searcher = ResearchSearcher(store=store, metrics=_query_metrics())
         result = searcher.get_by_id(research_id)
 
         if result is None:
@@ -126,20 +403,241 @@ def show(research_id: str):
         raise click.Abort()
 
 
+@cli.command()
+@click.argument("research_id")
+@click.option(
+    "--top", "-t",
+    type=click.IntRange(min=1),
+    default=10,
+    help="表示する関連研究の件数（デフォルトは10件）"
+)
+def related(research_id: str, top: int):
+    """関連する研究課題を表示
+
+    キーワードと研究課題名・研究概要の類似度（MinHash/LSH）から推薦します
+
+    \b
+    例:
+      seedsearch related 25KJ2239
+      seedsearch related 25KJ2239 --top 5
+    """
+    try:
+        store = _load_store()
+
+        # 基準となる研究課題を取得
+        searcher = ResearchSearcher(store=store, metrics=_query_metrics())
+        base = searcher.get_by_id(research_id)
+
+        if base is None:
+            click.echo(f"\n研究課題が見つかりませんでした: {research_id}\n")
+            return
+
+        # 保存済みの類似度インデックスを読み込んで近傍を取得（初回のみ作成）
+        index = RelatedIndex.for_store(store)
+        neighbours = index.related(int(base.name), top=top)
+
+        positions = [pos for pos, _ in neighbours]
+        results = store.take(positions, ResultDisplay.LIST_COLUMNS).assign(
+            類似度=[score for _, score in neighbours]
+        )
+
+        display = ResultDisplay()
+        display.display_related(base, results)
+
+    except FileNotFoundError as e:
+        click.echo(f"エラー: {e}", err=True)
+        raise click.Abort()
+    except Exception as e:
+        click.echo(f"エラーが発生しました: {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option(
+    "--limit", "-l",
+    type=click.IntRange(min=1),
+    default=10,
+    help="1回の検索で表示する件数（デフォルトは10件）"
+)
+@click.option(
+    "--watch-interval",
+    type=click.FloatRange(min=0.5),
+    default=5.0,
+    help="データファイルの更新を確認する間隔（秒）"
+)
+def interactive(limit: int, watch_interval: float):
+    """対話形式で検索
+
+    データファイルが更新されると、検索を止めずに新しいデータへ切り替えます
+
+    \b
+    入力例:
+      AI ロボット       # AND検索
+      show 25KJ2239    # 詳細表示
+      exit             # 終了
+    """
+    try:
+        reloader = ReloadingSearcher(metrics=_query_metrics())
+    except FileNotFoundError as e:
+        click.echo(f"エラー: {e}", err=True)
+        raise click.Abort()
+
+    _warn_cache_error(reloader.loader)
+    reloader.start(interval=watch_interval)
+    display = ResultDisplay()
+    version = reloader.version
+    click.echo("\n検索ワードを入力してください（終了するには exit）\n")
+
+    try:
+        while True:
+            try:
+                line = click.prompt(
+                    "seedsearch", default="", show_default=False, prompt_suffix="> "
+                ).strip()
+            except click.Abort:
+                break
+
+            if line in ("exit", "quit"):
+                break
+            if not line:
+                continue
+
+            # 1回の処理ではこの時点のバージョンだけを使う
+            searcher = reloader.current()
+            if reloader.version != version:
+                version = reloader.version
+                click.echo("（データファイルの更新を反映しました）")
+
+            try:
+                if line.startswith("show "):
+                    research_id = line[len("show "):].strip()
+                    result = searcher.get_by_id(research_id)
+                    if result is None:
+                        click.echo(f"\n研究課題が見つかりませんでした: {research_id}\n")
+                    else:
+                        display.display_detail(result)
+                    continue
+
+                results = searcher.search(line).head(limit)
+                search_keywords = [kw.strip() for kw in line.split() if kw.strip()]
+                display.display_list(
+                    searcher.store.take(results.index, ResultDisplay.LIST_COLUMNS),
+                    limit=limit,
+                    search_keywords=search_keywords,
+                )
+            except Exception as e:
+                click.echo(f"エラーが発生しました: {e}", err=True)
+    finally:
+        reloader.stop()
+
+
+@cli.command()
+@click.option(
+    "--slowest", "-s",
+    type=click.IntRange(min=0),
+    default=5,
+    help="表示する遅いクエリの件数"
+)
+@click.option(
+    "--format", "-F", "fmt",
+    type=click.Choice(["text", "prometheus"]),
+    default="text",
+    help="出力形式（text: 集計結果 / prometheus: Prometheusのテキスト形式）"
+)
+def stats(slowest: int, fmt: str):
+    """検索の実行記録を集計して表示
+
+    記録は seedsearch --metrics または SEEDSEARCH_METRICS=1 で有効化します
+
+    \b
+    例:
+      seedsearch stats
+      seedsearch stats --format prometheus > seedsearch.prom
+    """
+    try:
+        metrics = QueryMetrics()
+
+        if fmt == "prometheus":
+            # カウンターが記録ファイルの退避で減らないよう累計値を出力
+            click.echo(to_prometheus(metrics.totals()), nl=False)
+            return
+
+        records = metrics.read()
+
+        if not records:
+            click.echo("\n実行記録がありません")
+            click.echo("→ seedsearch --metrics search ... のように記録を有効化してください\n")
+            return
+
+        summary = summarize(records, slowest=slowest)
+
+        click.echo(f"\n記録ファイル: {metrics.path}")
+        click.echo(f"記録件数: {summary['total']}件\n")
+
+        click.echo("【レイテンシ（ミリ秒）】")
+        for op, op_stats in summary["ops"].items():
+            click.echo(
+                f"  {op}: {op_stats['count']}件  "
+                f"p50={op_stats['p50']:.1f}  p95={op_stats['p95']:.1f}  "
+                f"p99={op_stats['p99']:.1f}  max={op_stats['max']:.1f}"
+            )
+        click.echo()
+
+        if summary["fields"]:
+            click.echo("【検索フィールド】")
+            for field, count in summary["fields"].most_common():
+                click.echo(f"  {field}: {count}件")
+            click.echo("【演算子】")
+            for operator, count in summary["operators"].most_common():
+                click.echo(f"  {operator}: {count}件")
+            click.echo(f"  完全一致: {summary['exact']}件")
+            click.echo()
+
+        click.echo("【ヒット件数の分布】")
+        for label, count in summary["hits"].items():
+            click.echo(f"  {label}件: {count}回")
+        click.echo()
+
+        click.echo("【インデックスの利用】")
+        for index, count in summary["indexes"].most_common():
+            click.echo(f"  {index}: {count}回")
+        click.echo(f"  検索時のインデックス作成: {summary['index_builds']}回")
+        click.echo()
+
+        if summary["slowest"]:
+            click.echo("【遅いクエリ】")
+            for record in summary["slowest"]:
+                options = [record.get("field"), record.get("operator")]
+                if record.get("exact"):
+                    options.append("exact")
+                options += record.get("filters", [])
+                detail = ", ".join(str(o) for o in options if o)
+                click.echo(
+                    f"  {record['latency_ms']:.1f}ms  {record['op']} \"{record.get('query', '')}\""
+                    + (f" ({detail})" if detail else "")
+                    + f"  ヒット: {record.get('hits', 0)}件"
+                )
+            click.echo()
+
+    except Exception as e:
+        click.echo(f"エラーが発生しました: {e}", err=True)
+        raise click.Abort()
+
+
 @cli.command()
 def info():
     """データファイルの情報を表示"""
     try:
         loader = DataLoader()
-        data = loader.load()
+        store = _load_store(loader)
 
         click.echo(f"\nデータファイル: {loader.csv_path}")
-        click.echo(f"総研究課題数: {len(data)}件")
-        click.echo(f"列数: {len(data.columns)}列\n")
+        click.echo(f"総研究課題数: {len(store)}件")
+        click.echo(f"列数: {len(store.columns)}列\n")
 
-        if "研究種目" in data.columns:
+        if "研究種目" in store.columns:
             click.echo("【研究種目別の内訳】")
-            type_counts = data["研究種目"].value_counts()
+            type_counts = store.frame(["研究種目"])["研究種目"].value_counts()
             for research_type, count in type_counts.head(10).items():
                 click.echo(f"  {research_type}: {count}件")
             click.echo()
@@ -9,6 +9,15 @@ from typing import Optional, List, Union, Literal
 class ResultDisplay:
     """検索結果を表示するクラス"""
 
+    # リスト表示で使用する列（行ストアからはこの列だけをデコードする）
+    LIST_COLUMNS = [
+        "研究課題/領域番号",
+        "研究課題名",
+        "研究代表者",
+        "研究分担者",
+        "キーワード",
+    ]
+
     @staticmethod
     def _highlight_keywords(text: str, keywords: Union[str, List[str], None]) -> str:
         """
@@ -113,6 +122,55 @@ class ResultDisplay:
             if co_investigators_display:
                 print(f"   研究分担者: {co_investigators_display}")
             print(f"   キーワード: {keywords_display}")
+
+            # 研究期間・総配分額（絞り込み・並べ替え時のみ列が含まれる）
+            period = row.get("研究期間 (年度)", "")
+            if pd.notna(period) and period:
+                print(f"   研究期間: {period}")
+            budget = row.get("総配分額", "")
+            if pd.notna(budget) and budget:
+                print(f"   総配分額: {budget}")
+            print()
+        print("詳細を確認するには、以下のコマンドを使用してください:")
+        print("  seedsearch show <研究課題番号>\n")
+
+    @staticmethod
+    def display_related(base: pd.Series, results: pd.DataFrame) -> None:
+        """
+        関連する研究課題をリスト形式で表示
+
+        Args:
+            base: 基準となる研究課題データ（pandas Series）
+            results: 関連する研究課題のDataFrame（「類似度」列を含む）
+        """
+        base_id = base.get("研究課題/領域番号", "N/A")
+        base_title = base.get("研究課題名", "タイトルなし")
+        print(f"\n[{base_id}] {base_title} の関連研究")
+
+        if results.empty:
+            print("\n関連する研究課題が見つかりませんでした\n")
+            return
+
+        print(f"関連研究: {len(results)}件\n")
+
+        for idx, (_, row) in enumerate(results.iterrows(), 1):
+            research_id = row.get("研究課題/領域番号", "N/A")
+            title = row.get("研究課題名", "タイトルなし")
+            researcher = row.get("研究代表者", "不明")
+            similarity = row.get("類似度", 0.0)
+
+            keywords = row.get("キーワード", "")
+            if pd.notna(keywords) and keywords:
+                keyword_list = str(keywords).split(" / ")[:3]
+                keywords_display = ", ".join(keyword_list)
+                if len(str(keywords).split(" / ")) > 3:
+                    keywords_display += "..."
+            else:
+                keywords_display = "なし"
+
+            print(f"{idx}. [{research_id}] {title} (類似度: {similarity:.2f})")
+            print(f"   研究代表者: {researcher}")
+            print(f"   キーワード: {keywords_display}")
             print()
         print("詳細を確認するには、以下のコマンドを使用してください:")
         print("  seedsearch show <研究課題番号>\n")
@@ -0,0 +1,234 @@
+"""完全一致検索用のハッシュインデックス"""
+
+import hashlib
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+class ExactIndex:
+    """列ごとに「値 → 行番号配列」のハッシュインデックスを保持するクラス
+
+    インデックスは列ごとに初回の検索時に作成し、以降は辞書の参照だけで
+    該当行を取得する。複数の値を持つ列（キーワードなど）は区切り文字で
+    分割し、個々の値で引けるようにする。
+
+    save() で保存したインデックスは load() でメモリマップとして開けるため、
+    別プロセスで作成したインデックスを辞書を作り直さずに使える。
+    """
+
+    # 複数の値を区切り文字で連結している列
+    SPLIT_SEPARATORS = {
+        "キーワード": " / ",
+    }
+
+    # save() で作成するメタデータのファイル名
+    META_FILE = "exact.json"
+
+    _EMPTY = np.empty(0, dtype=np.int64)
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Args:
+            data: 検索対象のDataFrame
+        """
+        self.data = data
+        self._postings: dict[str, Union[dict[str, np.ndarray], SavedPostings]] = {}
+
+    @classmethod
+    def load(cls, data: pd.DataFrame, directory: Path) -> "ExactIndex":
+        """
+        save() で保存したインデックスを開く
+
+        保存されていない列は通常どおり初回の検索時に作成する
+
+        Args:
+            data: 検索対象のDataFrame（保存時と同じ行順）
+            directory: 保存先のディレクトリ
+
+        Returns:
+            ExactIndex: インデックス
+        """
+        directory = Path(directory)
+        index = cls(data)
+        try:
+            with open(directory / cls.META_FILE, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return index
+
+        for i, column in enumerate(meta.get("columns", [])):
+            if column in data.columns:
+                index._postings[column] = SavedPostings(directory, i)
+        return index
+
+    def save(self, directory: Path) -> None:
+        """
+        作成済みの列のインデックスをディレクトリに保存
+
+        Args:
+            directory: 保存先のディレクトリ
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        columns = list(self._postings)
+        for i, column in enumerate(columns):
+            SavedPostings.write(directory, i, self.postings(column))
+
+        with open(directory / self.META_FILE, "w", encoding="utf-8") as f:
+            json.dump({"columns": columns}, f, ensure_ascii=False)
+
+    def is_built(self, column: str) -> bool:
+        """
+        列のインデックスが作成済みかどうか
+
+        Args:
+            column: 列名
+
+        Returns:
+            bool: 作成済みの場合はTrue
+        """
+        return column in self._postings
+
+    def postings(self, column: str) -> Union[dict[str, np.ndarray], "SavedPostings"]:
+        """
+        列のインデックスを取得（未作成の場合は作成）
+
+        Args:
+            column: 列名
+
+        Returns:
+            dict[str, np.ndarray]: 値から行番号（昇順）への辞書
+                （保存済みの場合は同じ get() を持つ SavedPostings）
+        """
+        if column not in self._postings:
+            separator = self.SPLIT_SEPARATORS.get(column)
+            groups: defaultdict[str, list[int]] = defaultdict(list)
+
+            for pos, value in enumerate(self.data[column]):
+                if pd.isna(value):
+                    continue
+                if separator is None:
+                    groups[str(value)].append(pos)
+                    continue
+                terms = {term.strip() for term in str(value).split(separator)}
+                for term in terms:
+                    if term:
+                        groups[term].append(pos)
+
+            self._postings[column] = {
+                value: np.array(positions, dtype=np.int64)
+                for value, positions in groups.items()
+            }
+
+        return self._postings[column]
+
+    def lookup(self, keyword: str, columns: Iterable[str]) -> np.ndarray:
+        """
+        いずれかの列の値が keyword と一致する行番号を取得
+
+        Args:
+            keyword: 検索キーワード
+            columns: 検索対象の列名
+
+        Returns:
+            np.ndarray: 行番号（昇順・重複なし）
+        """
+        result = self._EMPTY
+        for column in columns:
+            positions = self.postings(column).get(keyword)
+            if positions is not None:
+                result = np.union1d(result, positions)
+        return result
+
+
+def _hash_key(key: bytes) -> int:
+    """値のバイト列を64ビットのハッシュ値に変換"""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class SavedPostings:
+    """ファイルに保存した1列分の「値 → 行番号配列」をメモリマップで参照するクラス
+
+    値はハッシュ値の昇順に並べ、np.searchsorted で見つけた候補の値を
+    バイト列で照合するため、ハッシュ値が衝突しても誤った行は返さない。
+    """
+
+    # i列目のファイル名の接尾辞
+    FILES = ["hash", "key", "key.off", "pos", "pos.off"]
+
+    def __init__(self, directory: Path, i: int):
+        """
+        Args:
+            directory: write() で保存したディレクトリ
+            i: 列の番号
+        """
+        paths = {name: Path(directory) / f"{i}.{name}.npy" for name in self.FILES}
+        self._hashes = np.load(paths["hash"], mmap_mode="r")
+        self._keys = np.load(paths["key"], mmap_mode="r")
+        self._key_offsets = np.load(paths["key.off"], mmap_mode="r")
+        self._positions = np.load(paths["pos"], mmap_mode="r")
+        self._position_offsets = np.load(paths["pos.off"], mmap_mode="r")
+
+    @classmethod
+    def write(cls, directory: Path, i: int, postings: dict[str, np.ndarray]) -> None:
+        """
+        1列分の「値 → 行番号配列」を保存
+
+        Args:
+            directory: 保存先のディレクトリ
+            i: 列の番号
+            postings: 値から行番号への辞書
+        """
+        keys = [value.encode("utf-8") for value in postings]
+        hashes = np.array([_hash_key(key) for key in keys], dtype=np.uint64)
+        order = np.argsort(hashes, kind="stable")
+
+        sorted_keys = [keys[j] for j in order]
+        key_offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum([len(key) for key in sorted_keys], out=key_offsets[1:])
+
+        values = list(postings.values())
+        sorted_positions = [values[j] for j in order]
+        position_offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in sorted_positions], out=position_offsets[1:])
+
+        arrays = {
+            "hash": hashes[order],
+            "key": np.frombuffer(b"".join(sorted_keys), dtype=np.uint8),
+            "key.off": key_offsets,
+            "pos": (
+                np.concatenate(sorted_positions) if sorted_positions
+                else np.empty(0, dtype=np.int64)
+            ),
+            "pos.off": position_offsets,
+        }
+        for name in cls.FILES:
+            np.save(Path(directory) / f"{i}.{name}.npy", arrays[name])
+
+    def get(self, value: str, default: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        値に一致する行番号を取得（dict.get と同じ使い方）
+
+        Args:
+            value: 検索する値
+            default: 一致する値がない場合の戻り値
+
+        Returns:
+            np.ndarray: 行番号（昇順）、一致する値がない場合は default
+        """
+        key = value.encode("utf-8")
+        target = np.uint64(_hash_key(key))
+        lo = np.searchsorted(self._hashes, target, side="left")
+        hi = np.searchsorted(self._hashes, target, side="right")
+
+        for j in range(lo, hi):
+            start, end = self._key_offsets[j], self._key_offsets[j + 1]
+            if self._keys[start:end].tobytes() == key:
+                return self._positions[self._position_offsets[j]:self._position_offsets[j + 1]]
+        return default
@@ -0,0 +1,251 @@
+"""検索結果のファイル出力（バックグラウンド書き込み）"""
+
+import gzip
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+
+@dataclass
+class ExportStats:
+    """書き出し結果の統計情報"""
+
+    rows: int  # 書き出した行数
+    bytes_written: int  # 出力ファイルのサイズ（バイト）
+    elapsed: float  # 経過時間（秒）
+
+    @property
+    def rows_per_sec(self) -> float:
+        """1秒あたりの行数"""
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        """1秒あたりの書き込み量（MB）"""
+        if self.elapsed <= 0:
+            return 0.0
+        return self.bytes_written / 1024 / 1024 / self.elapsed
+
+
+class BackgroundWriter:
+    """DataFrameのチャンクを別スレッドでシリアライズ・圧縮して書き込むクラス
+
+    write() はチャンクをキューに積むだけで戻るため、呼び出し側は
+    次のチャンクの作成（行ストアからのデコード）を書き込みと並行して進められる。
+    キューの長さは queue_size で制限し、メモリ使用量が増え続けないようにする。
+    """
+
+    # 出力形式と使用可能な圧縮方式（先頭がデフォルト。JSONL/CSVは拡張子が .gz ならgzip）
+    COMPRESSIONS = {
+        "parquet": ["zstd", "snappy", "gzip", "none"],
+        "jsonl": ["none", "gzip"],
+        "csv": ["none", "gzip"],
+    }
+
+    _SENTINEL = None
+
+    def __init__(
+        self,
+        path: Path,
+        fmt: str,
+        compression: Optional[str] = None,
+        queue_size: int = 4,
+    ):
+        """
+        Args:
+            path: 出力ファイルのパス
+            fmt: 出力形式（"parquet", "jsonl", "csv"）
+            compression: 圧縮方式（Noneの場合は形式と拡張子から決定）
+            queue_size: 書き込み待ちにできるチャンク数の上限
+
+        Raises:
+            ValueError: 無効な出力形式・圧縮方式が指定された場合、
+                .gz のファイルに圧縮なしで書き出そうとした場合
+            ImportError: parquet形式でpyarrowがインストールされていない場合
+        """
+        if fmt not in self.COMPRESSIONS:
+            raise ValueError(
+                f"無効な出力形式です: {fmt}\n"
+                f"使用可能な形式: {', '.join(self.COMPRESSIONS.keys())}"
+            )
+        gz_suffix = Path(path).suffix.lower() == ".gz"
+        if compression is None:
+            compression = "gzip" if gz_suffix and fmt != "parquet" else self.COMPRESSIONS[fmt][0]
+        if compression not in self.COMPRESSIONS[fmt]:
+            raise ValueError(
+                f"{fmt}形式では使用できない圧縮方式です: {compression}\n"
+                f"使用可能な圧縮方式: {', '.join(self.COMPRESSIONS[fmt])}"
+            )
+        if fmt != "parquet" and gz_suffix and compression != "gzip":
+            raise ValueError(
+                f".gz のファイルには圧縮なしで書き出せません: {path}\n"
+                f"--compression gzip を指定するか、.gz を除いたファイル名にしてください"
+            )
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ImportError(
+                    "parquet形式での出力には pyarrow が必要です\n"
+                    "uv pip install 'seedsearch[parquet]' でインストールしてください"
+                ) from e
+
+        self.path = Path(path)
+        self.fmt = fmt
+        self.compression = compression
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name="seedsearch-export", daemon=True
+        )
+        self._error: Optional[BaseException] = None
+        self._drained = False
+        self._rows = 0
+        self._started_at = 0.0
+        self.stats: Optional[ExportStats] = None
+
+    def __enter__(self) -> "BackgroundWriter":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # 呼び出し側の例外を優先し、書き込みスレッドを停止して書きかけのファイルを削除
+            self._queue.put(self._SENTINEL)
+            self._thread.join()
+            self._discard()
+
+    def start(self) -> None:
+        """書き込みスレッドを開始"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._started_at = time.perf_counter()
+        self._thread.start()
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """
+        チャンクを書き込みキューに追加（キューが満杯の場合は空くまで待つ）
+
+        Args:
+            chunk: 書き出す行のDataFrame
+
+        Raises:
+            Exception: 書き込みスレッドでエラーが発生していた場合
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put(chunk)
+
+    def close(self) -> ExportStats:
+        """
+        残りのチャンクを書き出してファイルを閉じる
+
+        Returns:
+            ExportStats: 書き出し結果の統計情報
+
+        Raises:
+            Exception: 書き込みスレッドでエラーが発生していた場合（書きかけのファイルは削除）
+        """
+        if self.stats is not None:
+            return self.stats
+
+        self._queue.put(self._SENTINEL)
+        self._thread.join()
+        if self._error is not None:
+            self._discard()
+            raise self._error
+
+        self.stats = ExportStats(
+            rows=self._rows,
+            bytes_written=self.path.stat().st_size,
+            elapsed=time.perf_counter() - self._started_at,
+        )
+        return self.stats
+
+    def _discard(self) -> None:
+        """書きかけの出力ファイルを削除"""
+        try:
+            self.path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def _run(self) -> None:
+        """書き込みスレッドの処理"""
+        try:
+            if self.fmt == "parquet":
+                self._write_parquet()
+            else:
+                self._write_text()
+        except BaseException as e:
+            self._error = e
+            # write() が満杯のキューで待ち続けないよう、終了まで読み捨てる
+            while not self._drained and self._queue.get() is not self._SENTINEL:
+                pass
+
+    def _chunks(self):
+        """キューから終了の合図までチャンクを取り出す"""
+        while True:
+            chunk = self._queue.get()
+            if chunk is self._SENTINEL:
+                self._drained = True
+                return
+            yield chunk
+
+    def _write_text(self) -> None:
+        """JSONL/CSV形式で書き出し（gzip圧縮に対応）"""
+        # CSVはExcelで文字化けしないようBOMを付ける
+        encoding = "utf-8-sig" if self.fmt == "csv" else "utf-8"
+        if self.compression == "gzip":
+            f = gzip.open(self.path, "wt", encoding=encoding, newline="")
+        else:
+            f = open(self.path, "w", encoding=encoding, newline="")
+
+        with f:
+            for chunk in self._chunks():
+                if self.fmt == "csv":
+                    f.write(chunk.to_csv(index=False, header=self._rows == 0))
+                elif not chunk.empty:
+                    f.write(chunk.to_json(orient="records", lines=True, force_ascii=False))
+                self._rows += len(chunk)
+
+    def _write_parquet(self) -> None:
+        """Parquet形式で書き出し（スキーマは最初のチャンクから決定）"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        compression = None if self.compression == "none" else self.compression
+        try:
+            for chunk in self._chunks():
+                if writer is None:
+                    schema = pa.schema(
+                        [(col, self._arrow_type(chunk[col])) for col in chunk.columns]
+                    )
+                    writer = pq.ParquetWriter(self.path, schema, compression=compression)
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                writer.write_table(table)
+                self._rows += len(chunk)
+
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @staticmethod
+    def _arrow_type(series: pd.Series):
+        """列の型に対応するArrowの型（チャンクごとに欠損値の有無が変わっても同じ型にする）"""
+        import pyarrow as pa
+
+        kind = series.dtype.kind
+        if kind in "iu":
+            return pa.int64()
+        if kind == "f":
+            return pa.float64()
+        if kind == "b":
+            return pa.bool_()
+        return pa.string()
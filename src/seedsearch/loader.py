@@ -1,9 +1,31 @@
 """CSVデータローダー"""
 
+import hashlib
+import json
+import os
 import pandas as pd
 from pathlib import Path
-from typing import Optional
-from importlib.resources import files
+from typing import Optional, Tuple, Union
+from importlib.resources import files, as_file
+
+from .related import RelatedIndex
+from .rowstore import MemoryStore, RowStore
+
+
+def default_cache_dir() -> Path:
+    """
+    キャッシュディレクトリを取得
+
+    環境変数 SEEDSEARCH_CACHE_DIR が設定されていればそれを使用し、
+    未設定の場合は ~/.cache/seedsearch を使用する
+
+    Returns:
+        Path: キャッシュディレクトリのパス
+    """
+    cache_dir = os.environ.get("SEEDSEARCH_CACHE_DIR")
+    if cache_dir:
+        return Path(cache_dir)
+    return Path.home() / ".cache" / "seedsearch"
 
 
 class DataLoader:
@@ -21,6 +43,9 @@ class DataLoader:
         else:
             self.csv_path = csv_path
 
+        # 行ストアを作成できずに MemoryStore で代用した場合の原因
+        self.cache_error: Optional[OSError] = None
+
     def load(self) -> pd.DataFrame:
         """
         CSVファイルを読み込んでDataFrameを返す
@@ -35,8 +60,6 @@ class DataLoader:
         try:
             # CSVを読み込み（BOM付きUTF-8に対応）
             # パッケージ内のリソースの場合は直接読み込み
-            from importlib.resources import as_file
-
             # csv_pathがパッケージリソースかどうかを確認
             if "seedsearch" in str(self.csv_path) and not self.csv_path.exists():
                 # パッケージリソースから読み込み
@@ -69,6 +92,116 @@ class DataLoader:
                 f"エラー: {str(e)}"
             ) from e
 
+    def _stat(self) -> Tuple[str, os.stat_result]:
+        """
+        CSVファイルの絶対パスとstat情報を取得
+
+        Returns:
+            Tuple[str, os.stat_result]: (絶対パス, stat情報)
+
+        Raises:
+            FileNotFoundError: CSVファイルが見つからない場合
+        """
+        if "seedsearch" in str(self.csv_path) and not self.csv_path.exists():
+            # パッケージリソースの場合は実ファイルとして取り出して確認
+            data_file = files("seedsearch.data").joinpath("kaken.csv")
+            with as_file(data_file) as csv_file:
+                return str(data_file), Path(csv_file).stat()
+
+        if not self.csv_path.exists():
+            raise FileNotFoundError(
+                f"データファイルが見つかりません: {self.csv_path}\n"
+                f"data/kaken.csv を配置してください"
+            )
+        return str(self.csv_path.resolve()), self.csv_path.stat()
+
+    def fingerprint(self) -> str:
+        """
+        CSVファイルのフィンガープリントを取得
+
+        パス・サイズ・更新時刻から計算するため、ファイルを読まずに変更を検知できる
+
+        Returns:
+            str: フィンガープリント（16進文字列）
+
+        Raises:
+            FileNotFoundError: CSVファイルが見つからない場合
+        """
+        resolved, stat = self._stat()
+        key = f"{resolved}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def load_store(self, cache_dir: Optional[Path] = None) -> Union[RowStore, MemoryStore]:
+        """
+        CSVファイルに対応する行ストアを取得
+
+        キャッシュに同じフィンガープリントの行ストアがあればそれを開き、
+        なければCSVを読み込んで作成する。関連研究の署名も同時に作成して保存する。
+        作成した場合は、同じCSVファイルから作られた古い行ストアのうち、
+        どのプロセスも開いていないものを削除する。
+
+        キャッシュディレクトリに書き込めない場合は、読み込んだDataFrameを
+        MemoryStore で返し、原因を cache_error に記録する。
+
+        Args:
+            cache_dir: キャッシュディレクトリ（Noneの場合はdefault_cache_dir()）
+
+        Returns:
+            RowStore: 行ストア（作成できない場合は MemoryStore）
+
+        Raises:
+            FileNotFoundError: CSVファイルが見つからない場合
+        """
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+
+        store_dir = Path(cache_dir) / "rowstore" / self.fingerprint()
+        try:
+            return RowStore(store_dir)
+        except (OSError, ValueError):
+            # 未作成・読み込めない・形式が古い場合は作り直す
+            pass
+
+        source, _ = self._stat()
+        data = self.load()
+        try:
+            store = RowStore.build(data, store_dir, source=source)
+        except OSError as e:
+            # キャッシュディレクトリに書き込めない場合はメモリ上のデータで代用する
+            self.cache_error = e
+            return MemoryStore(data)
+
+        try:
+            # 関連研究の署名も行ストアと一緒に作成し、最初の related で待たせない
+            RelatedIndex.for_store(store)
+        except OSError:
+            # 保存できない場合は related の実行時に作り直す
+            pass
+
+        self._remove_stale_stores(store_dir, source)
+        return store
+
+    @staticmethod
+    def _remove_stale_stores(store_dir: Path, source: str) -> None:
+        """
+        同じCSVファイルから作られた古い行ストアを削除（使用中のものは残す）
+
+        Args:
+            store_dir: 作成した行ストアのディレクトリ
+            source: CSVファイルの絶対パス
+        """
+        for directory in store_dir.parent.iterdir():
+            # 作成途中の一時ディレクトリ（.rowstore-*）は対象外
+            if directory.name.startswith(".") or directory == store_dir:
+                continue
+            try:
+                with open(directory / RowStore.META_FILE, encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if meta.get("source") == source:
+                RowStore.remove_if_unused(directory)
+
     def get_column_names(self) -> list[str]:
         """
         CSVファイルの列名を取得
@@ -0,0 +1,356 @@
+"""検索の実行記録（レイテンシ・ヒット件数など）の保存と集計"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, List, Optional
+
+from .loader import default_cache_dir
+
+try:
+    import fcntl
+except ImportError:  # Windowsではプロセス間のロックを行わない
+    fcntl = None
+
+
+class QueryMetrics:
+    """search / get_by_id の実行記録をJSONL形式で保存するクラス
+
+    記録ファイルが max_bytes を超えると ``.1`` を付けた名前に退避し、
+    新しいファイルに書き始める。退避は1世代だけ保持するため、
+    ディスク使用量はおよそ max_bytes の2倍までに収まる。
+
+    Prometheus向けの累計値（件数・走査行数・レイテンシのヒストグラムなど）は
+    退避の影響を受けないよう、記録のたびに ``.totals.json`` のファイルに加算する。
+    """
+
+    # 有効化に使う環境変数
+    ENV_VAR = "SEEDSEARCH_METRICS"
+
+    # レイテンシのヒストグラムの境界（ミリ秒）
+    LATENCY_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+    # ヒット件数の分布の境界（件数以下）
+    HIT_BUCKETS = [0, 1, 10, 100, 1000]
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = 1024 * 1024):
+        """
+        Args:
+            path: 記録ファイルのパス（Noneの場合はキャッシュディレクトリの metrics.jsonl）
+            max_bytes: 記録ファイルを退避するサイズ（バイト）
+        """
+        self.path = Path(path) if path is not None else default_cache_dir() / "metrics.jsonl"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def backup_path(self) -> Path:
+        """退避したファイルのパス"""
+        return self.path.with_name(self.path.name + ".1")
+
+    @property
+    def totals_path(self) -> Path:
+        """累計値を保存するファイルのパス"""
+        return self.path.with_name(self.path.name + ".totals.json")
+
+    @classmethod
+    def enabled_by_env(cls) -> bool:
+        """
+        環境変数で記録が有効化されているかどうか
+
+        Returns:
+            bool: SEEDSEARCH_METRICS が 1/true/yes/on の場合はTrue
+        """
+        return os.environ.get(cls.ENV_VAR, "").lower() in ("1", "true", "yes", "on")
+
+    def record(self, op: str, latency_ms: float, **fields: Any) -> None:
+        """
+        1回分の実行記録を追記
+
+        書き込みに失敗しても検索自体は止めない
+
+        Args:
+            op: 操作名（"search", "get_by_id"）
+            latency_ms: 処理時間（ミリ秒）
+            **fields: 追加で記録する項目（行数・ヒット件数・使用したインデックスなど）
+        """
+        entry = {"ts": time.time(), "op": op, "latency_ms": round(latency_ms, 3), **fields}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # 累計ファイルのロックで、他のプロセスの退避・追記・加算と重ならないようにする
+                with open(self.totals_path, "a+", encoding="utf-8") as totals_file:
+                    _lock_file(totals_file)
+                    if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                        os.replace(self.path, self.backup_path)
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(line)
+                    self._add_to_totals(totals_file, entry)
+            except OSError:
+                pass
+
+    def _add_to_totals(self, totals_file, entry: dict) -> None:
+        """ロック済みの累計ファイルに1回分の記録を加算"""
+        totals_file.seek(0)
+        try:
+            totals = json.loads(totals_file.read())
+            _accumulate(totals, entry)
+        except (ValueError, KeyError, TypeError):
+            # 累計ファイルがない（壊れている）場合は残っている記録から作り直す
+            totals = _new_totals()
+            for record in self.read():
+                _accumulate(totals, record)
+
+        totals_file.seek(0)
+        totals_file.truncate()
+        totals_file.write(json.dumps(totals, ensure_ascii=False))
+
+    def totals(self) -> dict:
+        """
+        退避した分も含めた累計値を取得
+
+        Returns:
+            dict: 累計値（累計ファイルがない場合は残っている記録から計算）
+        """
+        try:
+            with open(self.totals_path, encoding="utf-8") as f:
+                _lock_file(f, shared=True)
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        totals = _new_totals()
+        for record in self.read():
+            _accumulate(totals, record)
+        return totals
+
+    def read(self) -> List[dict]:
+        """
+        保存されている実行記録を古い順に読み込み
+
+        Returns:
+            List[dict]: 実行記録のリスト（壊れた行は無視）
+        """
+        records = []
+        for path in (self.backup_path, self.path):
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        return records
+
+
+def _lock_file(f, shared: bool = False) -> None:
+    """
+    ファイルをプロセス間でロック（閉じると解除される）
+
+    Args:
+        f: ロックするファイル
+        shared: Trueの場合は読み込み用の共有ロック
+    """
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+
+def _new_totals() -> dict:
+    """空の累計値を作成"""
+    return {
+        "latency": {},
+        "queries": {},
+        "rows_scanned": {},
+        "hits": {},
+        "indexes": {},
+        "index_builds": 0,
+    }
+
+
+def _accumulate(totals: dict, record: dict) -> None:
+    """
+    1回分の実行記録を累計値に加算
+
+    Args:
+        totals: 累計値（_new_totals() の形式）
+        record: 実行記録
+    """
+    op = record.get("op", "")
+    latency_ms = record["latency_ms"]
+
+    # レイテンシのヒストグラム（各境界以下の件数）
+    latency = totals["latency"].setdefault(
+        op, {"buckets": [0] * len(QueryMetrics.LATENCY_BUCKETS_MS), "sum": 0.0, "count": 0}
+    )
+    for i, bound in enumerate(QueryMetrics.LATENCY_BUCKETS_MS):
+        if latency_ms <= bound:
+            latency["buckets"][i] += 1
+    latency["sum"] += latency_ms
+    latency["count"] += 1
+
+    # 操作・フィールド・演算子・完全一致の組み合わせごとの件数（タブ区切りのキー）
+    key = "\t".join([
+        op,
+        record.get("field", ""),
+        record.get("operator", ""),
+        str(bool(record.get("exact"))).lower(),
+    ])
+    totals["queries"][key] = totals["queries"].get(key, 0) + 1
+
+    for name in ("rows_scanned", "hits"):
+        totals[name][op] = totals[name].get(op, 0) + record.get(name, 0)
+    for index in record.get("indexes", []):
+        totals["indexes"][index] = totals["indexes"].get(index, 0) + 1
+    if record.get("index_built"):
+        totals["index_builds"] += 1
+
+
+def _labels(**kwargs: Any) -> str:
+    """
+    Prometheusのラベル表記を作成
+
+    Args:
+        **kwargs: ラベル名と値
+
+    Returns:
+        str: {name="value",...} 形式の文字列
+    """
+    escaped = {
+        key: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for key, value in kwargs.items()
+    }
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped.items()) + "}"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    パーセンタイルを計算（最近傍法）
+
+    Args:
+        values: 値のリスト
+        q: パーセンタイル（0〜100）
+
+    Returns:
+        float: パーセンタイル値（値がない場合は0.0）
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(records: Iterable[dict], slowest: int = 5) -> dict:
+    """
+    実行記録を集計
+
+    Args:
+        records: 実行記録
+        slowest: 取得する遅いクエリの件数
+
+    Returns:
+        dict: 操作ごとのレイテンシのパーセンタイル、フィールド・演算子の利用回数、
+            検索のヒット件数の分布、インデックスの利用回数、遅いクエリの一覧
+    """
+    records = list(records)
+
+    ops = {}
+    for op in sorted({r.get("op", "") for r in records}):
+        latencies = [r["latency_ms"] for r in records if r.get("op") == op]
+        ops[op] = {
+            "count": len(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies),
+        }
+
+    searches = [r for r in records if r.get("op") == "search"]
+
+    # 検索のヒット件数の分布（境界の小さい順、get_by_id は含めない）
+    hit_labels = [f"<={b}" for b in QueryMetrics.HIT_BUCKETS]
+    hit_labels.append(f">{QueryMetrics.HIT_BUCKETS[-1]}")
+    hit_counts: Counter = Counter()
+    for r in searches:
+        hits = r.get("hits", 0)
+        label = next(
+            (f"<={b}" for b in QueryMetrics.HIT_BUCKETS if hits <= b), hit_labels[-1]
+        )
+        hit_counts[label] += 1
+    hit_buckets = {label: hit_counts[label] for label in hit_labels if hit_counts[label]}
+
+    return {
+        "total": len(records),
+        "ops": ops,
+        "fields": Counter(r.get("field", "") for r in searches),
+        "operators": Counter(r.get("operator", "") for r in searches),
+        "exact": sum(1 for r in searches if r.get("exact")),
+        "hits": hit_buckets,
+        "indexes": Counter(index for r in records for index in r.get("indexes", [])),
+        "index_builds": sum(1 for r in records if r.get("index_built")),
+        "slowest": sorted(records, key=lambda r: r["latency_ms"], reverse=True)[:slowest],
+    }
+
+
+def to_prometheus(totals: dict) -> str:
+    """
+    累計値をPrometheusのテキスト形式に変換
+
+    記録ファイルの退避で値が減らないよう、QueryMetrics.totals() の累計値を使う
+
+    Args:
+        totals: 累計値
+
+    Returns:
+        str: Prometheusのテキスト形式
+    """
+    lines = []
+
+    lines.append("# HELP seedsearch_query_latency_seconds Query latency.")
+    lines.append("# TYPE seedsearch_query_latency_seconds histogram")
+    for op, latency in sorted(totals["latency"].items()):
+        for bound, count in zip(QueryMetrics.LATENCY_BUCKETS_MS, latency["buckets"]):
+            lines.append(
+                f"seedsearch_query_latency_seconds_bucket{_labels(op=op, le=bound / 1000)} {count}"
+            )
+        lines.append(
+            f"seedsearch_query_latency_seconds_bucket{_labels(op=op, le='+Inf')} {latency['count']}"
+        )
+        lines.append(f"seedsearch_query_latency_seconds_sum{_labels(op=op)} {latency['sum'] / 1000}")
+        lines.append(f"seedsearch_query_latency_seconds_count{_labels(op=op)} {latency['count']}")
+
+    lines.append("# HELP seedsearch_queries_total Queries by field and operator.")
+    lines.append("# TYPE seedsearch_queries_total counter")
+    for key, count in sorted(totals["queries"].items()):
+        op, field, operator, exact = key.split("\t")
+        lines.append(
+            "seedsearch_queries_total"
+            f"{_labels(op=op, field=field, operator=operator, exact=exact)} {count}"
+        )
+
+    for name, key, help_text in (
+        ("seedsearch_query_rows_scanned_total", "rows_scanned", "Rows scanned by queries."),
+        ("seedsearch_query_hits_total", "hits", "Rows returned by queries."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for op, total in sorted(totals[key].items()):
+            lines.append(f"{name}{_labels(op=op)} {total}")
+
+    lines.append("# HELP seedsearch_index_used_total Queries that used each index.")
+    lines.append("# TYPE seedsearch_index_used_total counter")
+    for index, count in sorted(totals["indexes"].items()):
+        lines.append(f"seedsearch_index_used_total{_labels(index=index)} {count}")
+
+    lines.append("# HELP seedsearch_index_builds_total Queries that built an index on first use.")
+    lines.append("# TYPE seedsearch_index_builds_total counter")
+    lines.append(f"seedsearch_index_builds_total {totals['index_builds']}")
+
+    return "\n".join(lines) + "\n"
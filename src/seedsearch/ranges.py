@@ -0,0 +1,240 @@
+"""研究期間・総配分額の数値化と範囲検索用インデックス"""
+
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# 「2019-04-01」または「2019」形式の年（年度）表記
+_YEAR_PATTERN = re.compile(r"(\d{4})(?:[-/.](\d{1,2})[-/.]\d{1,2})?")
+
+# 「4,550千円」「550,000円」形式の金額表記（最初に現れるものが総額）
+_BUDGET_PATTERN = re.compile(r"([\d,]+)\s*(千円|円)")
+
+
+def parse_period(value) -> Optional[Tuple[int, int]]:
+    """
+    研究期間の文字列を開始年度・終了年度に変換
+
+    日付で書かれている場合は4月始まりの年度に換算する
+    （例: "2019-04-01 – 2023-03-31" → (2019, 2022)）
+
+    Args:
+        value: 研究期間 (年度) の値
+
+    Returns:
+        Tuple[int, int]: (開始年度, 終了年度)、解釈できない場合はNone
+    """
+    if pd.isna(value):
+        return None
+
+    years = []
+    for year, month in _YEAR_PATTERN.findall(str(value)):
+        fiscal_year = int(year)
+        if month and int(month) < 4:
+            fiscal_year -= 1
+        years.append(fiscal_year)
+
+    if not years:
+        return None
+    return years[0], years[-1]
+
+
+def parse_budget(value) -> Optional[int]:
+    """
+    総配分額の文字列を円単位の整数に変換
+
+    Args:
+        value: 総配分額の値（例: "4,550千円 (直接経費: 3,500千円、間接経費: 1,050千円)"）
+
+    Returns:
+        int: 総配分額（円）、解釈できない場合はNone
+    """
+    if pd.isna(value):
+        return None
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return int(value)
+
+    match = _BUDGET_PATTERN.search(str(value))
+    if match is None:
+        return None
+
+    amount = int(match.group(1).replace(",", ""))
+    if match.group(2) == "千円":
+        amount *= 1000
+    return amount
+
+
+class NumericIndex:
+    """開始年度・終了年度・総配分額の整数配列とソート済みインデックスを保持するクラス
+
+    各配列は欠損値を除いて昇順に並べた行番号（ソート順）を持ち、
+    範囲条件は np.searchsorted による二分探索で行番号の範囲に変換する。
+    save() で保存した配列は load() でメモリマップとして開ける。
+    """
+
+    PERIOD_COLUMN = "研究期間 (年度)"
+    BUDGET_COLUMN = "総配分額"
+
+    # 欠損値を表す値（ソート順には含めない）
+    MISSING = np.iinfo(np.int64).min
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Args:
+            data: 研究期間 (年度)・総配分額の列を含むDataFrame
+
+        Raises:
+            ValueError: 必要な列が存在しない場合
+        """
+        missing = [
+            col for col in (self.PERIOD_COLUMN, self.BUDGET_COLUMN)
+            if col not in data.columns
+        ]
+        if missing:
+            raise ValueError(
+                f"範囲検索に必要な列が見つかりません: {', '.join(missing)}"
+            )
+
+        periods = [parse_period(value) for value in data[self.PERIOD_COLUMN]]
+        budgets = [parse_budget(value) for value in data[self.BUDGET_COLUMN]]
+
+        self.size = len(data)
+        self.values = {
+            "start_year": np.array(
+                [p[0] if p else self.MISSING for p in periods], dtype=np.int64
+            ),
+            "end_year": np.array(
+                [p[1] if p else self.MISSING for p in periods], dtype=np.int64
+            ),
+            "budget": np.array(
+                [b if b is not None else self.MISSING for b in budgets], dtype=np.int64
+            ),
+        }
+
+        # 欠損値を除いた昇順の行番号と、その順に並べた値
+        self._order: dict[str, np.ndarray] = {}
+        self._sorted: dict[str, np.ndarray] = {}
+        for name, values in self.values.items():
+            valid = np.flatnonzero(values != self.MISSING)
+            order = valid[np.argsort(values[valid], kind="stable")]
+            self._order[name] = order
+            self._sorted[name] = values[order]
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["NumericIndex"]:
+        """
+        save() で保存した配列を開く
+
+        Args:
+            directory: 保存先のディレクトリ
+
+        Returns:
+            NumericIndex: インデックス、保存されていない場合はNone
+        """
+        directory = Path(directory)
+        index = cls.__new__(cls)
+        index.values = {}
+        index._order = {}
+        index._sorted = {}
+        try:
+            for name in ("start_year", "end_year", "budget"):
+                index.values[name] = np.load(directory / f"{name}.npy", mmap_mode="r")
+                index._order[name] = np.load(directory / f"{name}.order.npy", mmap_mode="r")
+                index._sorted[name] = np.load(directory / f"{name}.sorted.npy", mmap_mode="r")
+        except OSError:
+            return None
+
+        index.size = len(index.values["budget"])
+        return index
+
+    def save(self, directory: Path) -> None:
+        """
+        配列とソート順をディレクトリに保存
+
+        Args:
+            directory: 保存先のディレクトリ
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, values in self.values.items():
+            np.save(directory / f"{name}.npy", values)
+            np.save(directory / f"{name}.order.npy", self._order[name])
+            np.save(directory / f"{name}.sorted.npy", self._sorted[name])
+
+    def range_mask(
+        self, name: str, low: Optional[int] = None, high: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        値が low 以上 high 以下の行を表すブール配列を作成
+
+        Args:
+            name: 配列名（"start_year", "end_year", "budget"）
+            low: 下限（Noneの場合は下限なし）
+            high: 上限（Noneの場合は上限なし）
+
+        Returns:
+            np.ndarray: 行数分のブール配列（欠損値の行はFalse）
+        """
+        sorted_values = self._sorted[name]
+        lo = 0 if low is None else np.searchsorted(sorted_values, low, side="left")
+        hi = (
+            len(sorted_values) if high is None
+            else np.searchsorted(sorted_values, high, side="right")
+        )
+
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._order[name][lo:hi]] = True
+        return mask
+
+    def filter_mask(
+        self,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        min_budget: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        研究期間・総配分額の条件を満たす行を表すブール配列を作成
+
+        研究期間は year_from〜year_to の期間と1年度でも重なれば条件を満たす
+
+        Args:
+            year_from: 期間の開始年度（この年度以降も実施中の研究）
+            year_to: 期間の終了年度（この年度までに開始した研究）
+            min_budget: 総配分額の下限（円）
+
+        Returns:
+            np.ndarray: 行数分のブール配列
+        """
+        mask = np.ones(self.size, dtype=bool)
+        if year_from is not None:
+            mask &= self.range_mask("end_year", low=year_from)
+        if year_to is not None:
+            mask &= self.range_mask("start_year", high=year_to)
+        if min_budget is not None:
+            mask &= self.range_mask("budget", low=min_budget)
+        return mask
+
+    def sort_positions(
+        self, positions: np.ndarray, name: str, descending: bool = True
+    ) -> np.ndarray:
+        """
+        行番号をソート済みインデックスの順に並べ替え
+
+        Args:
+            positions: 並べ替える行番号
+            name: 並べ替えに使う配列名
+            descending: Trueの場合は降順
+
+        Returns:
+            np.ndarray: 並べ替えた行番号（欠損値の行は末尾に元の順序で並ぶ）
+        """
+        selected = np.zeros(self.size, dtype=bool)
+        selected[positions] = True
+
+        order = self._order[name][::-1] if descending else self._order[name]
+        missing = positions[self.values[name][positions] == self.MISSING]
+        return np.concatenate([order[selected[order]], missing])
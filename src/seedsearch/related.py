@@ -0,0 +1,322 @@
+"""MinHash/LSHによる関連研究の推薦"""
+
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .rowstore import RowStore
+
+
+class RelatedIndex:
+    """MinHash署名とLSHバケットで類似した研究課題を探すクラス
+
+    各研究課題を「キーワードの集合」と「研究課題名・研究概要の文字n-gram」
+    からなるshingle集合として表し、その集合同士のJaccard係数を
+    MinHash署名で近似する。署名をバンドに分割してバケットに振り分けておくことで、
+    近傍の候補を全件比較せずに取得できる。
+
+    署名とバンドごとのソート済みキーは行ストアの作成時に行ストアの
+    ディレクトリに保存しておき、次回以降はメモリマップで開くだけで使う。
+    """
+
+    # キーワードの区切り文字（KAKENのCSV形式）
+    KEYWORD_SEPARATOR = " / "
+
+    # shingleの対象列
+    KEYWORD_COLUMN = "キーワード"
+    TEXT_COLUMNS = ["研究課題名", "研究概要"]
+
+    # 行ストアのディレクトリに保存するファイル
+    SIGNATURES_FILE = "related.npy"
+    BAND_KEYS_FILE = "related.keys.npy"
+    BAND_ORDER_FILE = "related.order.npy"
+    BAND_SORTED_FILE = "related.sorted.npy"
+    META_FILE = "related.json"
+
+    # 署名のない（shingleが空の）行を表す値
+    _NO_SIGNATURE = np.iinfo(np.uint64).max
+
+    # バンド内の値を1つのキーにまとめる乗数（奇数）
+    _BAND_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+    # LSHのパラメータ: bands=64, rows_per_band=2
+    # Jaccard係数Jの2件が候補になる確率は 1 - (1 - J^2)^64 で、
+    # しきい値 (1/b)^(1/r) はおよそ0.125になる（J=0.2で約92%、J=0.1で約47%）。
+    # 関連する研究課題でも共有するキーワード・n-gramは一部だけで、
+    # Jaccard係数は0.1〜0.3程度にとどまることが多い。r=4（b=32、しきい値約0.42）の
+    # ような厳しい設定ではこれらの多くが候補から漏れるため、候補が増えるのを
+    # 許容して取りこぼしを減らす設定にしている。候補の類似度は署名の比較を
+    # ベクトル化して計算するため、候補が多くても総当たりのshingle比較より速い。
+    # 実データでの候補の割合は src/script/bench_related.py で確認できる
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        num_perm: int = 128,
+        bands: int = 64,
+        ngram: int = 3,
+        seed: int = 1,
+    ):
+        """
+        Args:
+            data: 対象のDataFrame
+            num_perm: MinHash署名の長さ（ハッシュ関数の数）
+            bands: LSHのバンド数（num_permを割り切れる必要がある）
+            ngram: 研究課題名・研究概要から作る文字n-gramの長さ
+            seed: ハッシュ関数の係数を生成する乱数シード
+
+        Raises:
+            ValueError: num_permがbandsで割り切れない場合
+        """
+        self._configure(num_perm, bands, ngram, seed)
+
+        self.size = len(data)
+        self.signatures = np.full((self.size, num_perm), self._NO_SIGNATURE, dtype=np.uint64)
+        for pos, (_, row) in enumerate(data.iterrows()):
+            sig = self.signature(self.shingles(row))
+            if sig is not None:
+                self.signatures[pos] = sig
+
+        self._index_bands()
+
+    def _configure(self, num_perm: int, bands: int, ngram: int, seed: int) -> None:
+        """パラメータを検証してハッシュ関数の係数を生成"""
+        if num_perm % bands != 0:
+            raise ValueError(
+                f"num_perm({num_perm})はbands({bands})で割り切れる必要があります"
+            )
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.ngram = ngram
+        self.seed = seed
+
+        # multiply-shift法: h(x) = ((a * x + b) mod 2^64) >> 32（aは奇数）
+        rng = np.random.default_rng(seed)
+        max_value = np.iinfo(np.uint64).max
+        self._a = rng.integers(0, max_value, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, max_value, size=num_perm, dtype=np.uint64)
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path,
+        num_perm: int = 128,
+        bands: int = 64,
+        ngram: int = 3,
+        seed: int = 1,
+    ) -> Optional["RelatedIndex"]:
+        """
+        保存済みの署名からインデックスを作成
+
+        Args:
+            directory: 署名を保存したディレクトリ（行ストアのディレクトリ）
+            num_perm: MinHash署名の長さ
+            bands: LSHのバンド数
+            ngram: 文字n-gramの長さ
+            seed: ハッシュ関数の乱数シード
+
+        Returns:
+            RelatedIndex: インデックス、保存されていないかパラメータが異なる場合はNone
+        """
+        directory = Path(directory)
+        try:
+            with open(directory / cls.META_FILE, encoding="utf-8") as f:
+                meta = json.load(f)
+            signatures = np.load(directory / cls.SIGNATURES_FILE, mmap_mode="r")
+            keys = np.load(directory / cls.BAND_KEYS_FILE, mmap_mode="r")
+            band_order = np.load(directory / cls.BAND_ORDER_FILE, mmap_mode="r")
+            band_sorted = np.load(directory / cls.BAND_SORTED_FILE, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        params = {"num_perm": num_perm, "bands": bands, "ngram": ngram, "seed": seed}
+        if {key: meta.get(key) for key in params} != params:
+            return None
+        rows = meta.get("rows")
+        if signatures.shape != (rows, num_perm) or keys.shape != (rows, bands):
+            return None
+        if band_order.shape != band_sorted.shape or band_order.shape[0] != bands:
+            return None
+
+        index = cls.__new__(cls)
+        index._configure(num_perm, bands, ngram, seed)
+        index.size = len(signatures)
+        index.signatures = signatures
+        index._keys = keys
+        index._band_order = band_order
+        index._band_sorted = band_sorted
+        # 署名のある行はどのバンドにも含まれるため、最初のバンドから判定できる
+        index._empty = np.ones(index.size, dtype=bool)
+        index._empty[band_order[0]] = False
+        return index
+
+    def save(self, directory: Path) -> None:
+        """
+        署名・バンドのキーとパラメータをディレクトリに保存
+
+        Args:
+            directory: 保存先のディレクトリ（行ストアのディレクトリ）
+        """
+        directory = Path(directory)
+        meta = {
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "ngram": self.ngram,
+            "seed": self.seed,
+            "rows": self.size,
+        }
+
+        # 読み込み中のプロセスが書きかけのファイルを見ないよう、一時ファイルから置き換える
+        for name, write in (
+            (self.SIGNATURES_FILE, lambda f: np.save(f, np.asarray(self.signatures))),
+            (self.BAND_KEYS_FILE, lambda f: np.save(f, np.asarray(self._keys))),
+            (self.BAND_ORDER_FILE, lambda f: np.save(f, np.asarray(self._band_order))),
+            (self.BAND_SORTED_FILE, lambda f: np.save(f, np.asarray(self._band_sorted))),
+            (self.META_FILE, lambda f: f.write(json.dumps(meta).encode("utf-8"))),
+        ):
+            tmp_path = directory / f".{name}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, directory / name)
+
+    @classmethod
+    def for_store(cls, store: RowStore) -> "RelatedIndex":
+        """
+        行ストアに対応するインデックスを取得（保存されていない場合は作成して保存）
+
+        通常は DataLoader.load_store() が行ストアの作成時に保存している
+
+        Args:
+            store: 行ストア
+
+        Returns:
+            RelatedIndex: インデックス
+        """
+        if store.directory is None:
+            # メモリ上のデータの場合は保存しない
+            return cls(store.frame([cls.KEYWORD_COLUMN, *cls.TEXT_COLUMNS]))
+
+        index = cls.load(store.directory)
+        if index is None or index.size != len(store):
+            index = cls(store.frame([cls.KEYWORD_COLUMN, *cls.TEXT_COLUMNS]))
+            index.save(store.directory)
+        return index
+
+    def shingles(self, row: pd.Series) -> set[str]:
+        """
+        研究課題1件分のshingle集合を作成
+
+        Args:
+            row: 研究課題データ（pandas Series）
+
+        Returns:
+            set[str]: キーワードと文字n-gramからなる集合
+        """
+        result: set[str] = set()
+
+        keywords = row.get(self.KEYWORD_COLUMN, "")
+        if pd.notna(keywords) and keywords:
+            for term in str(keywords).split(self.KEYWORD_SEPARATOR):
+                term = term.strip().lower()
+                if term:
+                    result.add(f"k:{term}")
+
+        for col in self.TEXT_COLUMNS:
+            text = row.get(col, "")
+            if pd.isna(text) or not text:
+                continue
+            # 空白の揺れがn-gramに影響しないよう除去してから分割
+            text = "".join(str(text).lower().split())
+            for i in range(max(len(text) - self.ngram + 1, 0)):
+                result.add(f"t:{text[i:i + self.ngram]}")
+
+        return result
+
+    def signature(self, shingles: Iterable[str]) -> Optional[np.ndarray]:
+        """
+        shingle集合からMinHash署名を計算
+
+        Args:
+            shingles: shingle集合
+
+        Returns:
+            np.ndarray: 長さnum_permの署名、集合が空の場合はNone
+        """
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return None
+
+        # uint64の乗算・加算は2^64を法として折り返す
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+    def _index_bands(self) -> None:
+        """署名をバンドごとのキーに変換し、バンドごとにキーの昇順に並べた行番号を作成"""
+        r = self.rows_per_band
+        values = np.asarray(self.signatures).reshape(self.size, self.bands, r)
+
+        # バンド内の値を1つのキーにまとめる。キーが衝突しても
+        # 類似度は署名から計算するため、候補が増えるだけで結果は変わらない
+        keys = values[:, :, 0].copy()
+        for i in range(1, r):
+            keys = keys * self._BAND_MIX + values[:, :, i]
+        self._keys = keys
+
+        self._empty = self.signatures[:, 0] == self._NO_SIGNATURE
+        valid = np.flatnonzero(~self._empty)
+        # 署名のない行はどのバンドにも含めないため、全バンドで行数がそろう
+        band_keys = keys[valid].T
+        order = np.argsort(band_keys, axis=1, kind="stable")
+        self._band_order = valid[order]
+        self._band_sorted = np.take_along_axis(band_keys, order, axis=1)
+
+    def candidates(self, pos: int) -> set[int]:
+        """
+        LSHバケットを共有する候補の行番号を取得
+
+        Args:
+            pos: 基準となる研究課題の行番号
+
+        Returns:
+            set[int]: 候補の行番号（基準自身は含まない）
+        """
+        if self._empty[pos]:
+            return set()
+
+        result: set[int] = set()
+        for band, key in enumerate(self._keys[pos]):
+            sorted_keys = self._band_sorted[band]
+            lo = np.searchsorted(sorted_keys, key, side="left")
+            hi = np.searchsorted(sorted_keys, key, side="right")
+            result.update(self._band_order[band][lo:hi].tolist())
+        result.discard(pos)
+        return result
+
+    def related(self, pos: int, top: int = 10) -> List[Tuple[int, float]]:
+        """
+        類似した研究課題を推定Jaccard係数の高い順に取得
+
+        Args:
+            pos: 基準となる研究課題の行番号
+            top: 取得する最大件数
+
+        Returns:
+            List[Tuple[int, float]]: (行番号, 推定Jaccard係数) のリスト
+        """
+        candidates = np.fromiter(self.candidates(pos), dtype=np.int64)
+        if candidates.size == 0:
+            return []
+
+        scores = (self.signatures[candidates] == self.signatures[pos]).mean(axis=1)
+        # 類似度の降順、同点は行番号の昇順
+        order = np.lexsort((candidates, -scores))[:top]
+        return [(int(candidates[i]), float(scores[i])) for i in order]
@@ -0,0 +1,229 @@
+"""常駐プロセス向けのデータ再読み込み"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from .loader import DataLoader
+from .metrics import QueryMetrics
+from .rowstore import RowStore
+from .search import ResearchSearcher
+
+
+def _build_in_process(
+    loader: DataLoader, columns: List[str]
+) -> Tuple[Optional[Path], Optional[pd.DataFrame]]:
+    """
+    行ストアとインデックスを作成してディスクに保存（子プロセスで実行）
+
+    Args:
+        loader: データローダー
+        columns: 検索用に読み込む列
+
+    Returns:
+        Tuple[Path, pd.DataFrame]: (行ストアのディレクトリ, 検索用の列のDataFrame)、
+            行ストアやインデックスを保存できない場合は (None, None)
+    """
+    store = loader.load_store()
+    if store.directory is None:
+        # 行ストアを作成できない場合は呼び出し元で作り直す
+        return None, None
+    data = store.frame(columns)
+
+    if ResearchSearcher.prepare_indexes(store, data) is None:
+        # インデックスを保存できない場合も同様
+        return None, None
+    return store.directory, data
+
+
+class ReloadingSearcher:
+    """データファイルの変更を検知して検索状態を入れ替えるクラス
+
+    データファイルのフィンガープリントが変わると、子プロセスで行ストアと
+    インデックスを作り直してディスクに保存し、完成したものをメモリマップで
+    開いた ResearchSearcher を参照の代入1回で入れ替える。CSVの解析や
+    インデックスの作成は子プロセスで行うため、作り直している間も
+    このプロセスの検索はGILの取り合いで遅くならない。
+
+    子プロセスは spawn で起動するため、このクラスを使うスクリプトは
+    ``if __name__ == "__main__":`` で保護しておくこと。
+
+    1回の処理の中では current() で取得した ResearchSearcher を使い続けること。
+    途中で入れ替えが起きても、その処理は1つのバージョンだけを参照する。
+    """
+
+    def __init__(
+        self,
+        loader: Optional[DataLoader] = None,
+        columns: Optional[Iterable[str]] = None,
+        metrics: Optional[QueryMetrics] = None,
+    ):
+        """
+        Args:
+            loader: データローダー（Noneの場合はデフォルトのデータファイル）
+            columns: 検索用に読み込む列（Noneの場合は全フィールドと範囲検索の列）
+            metrics: 実行記録の保存先（Noneの場合は記録しない）
+
+        Raises:
+            FileNotFoundError: データファイルが見つからない場合
+        """
+        self.loader = loader if loader is not None else DataLoader()
+        if columns is None:
+            columns = ResearchSearcher.columns_for(filtered=True)
+        self.columns = list(columns)
+        self.metrics = metrics
+
+        # 最初の状態は同期的に作成する
+        fingerprint = self.loader.fingerprint()
+        self._current = self._build()
+        self._fingerprint = fingerprint
+        self.version = 1
+        self.last_error: Optional[Exception] = None
+
+        self._lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._watch_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _build(self) -> ResearchSearcher:
+        """行ストアを開いてインデックスまで作成した ResearchSearcher を返す（最初の状態用）"""
+        store = self.loader.load_store()
+        searcher = ResearchSearcher(
+            store.frame(self.columns), store=store, metrics=self.metrics
+        )
+        searcher.build_indexes()
+        return searcher
+
+    def _build_in_child(self) -> ResearchSearcher:
+        """子プロセスで作成・保存した行ストアとインデックスを開いた ResearchSearcher を返す"""
+        # 検索に使用中の行ストアは、このプロセスが開いている間は削除されない
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            directory, data = pool.submit(
+                _build_in_process, self.loader, self.columns
+            ).result()
+        if directory is None:
+            # キャッシュに書き込めない場合はこのプロセスでメモリ上に作成する
+            return self._build()
+
+        searcher = ResearchSearcher(data, store=RowStore(directory), metrics=self.metrics)
+        searcher.load_indexes(directory / ResearchSearcher.INDEX_DIR)
+        return searcher
+
+    def current(self) -> ResearchSearcher:
+        """
+        現在の ResearchSearcher を取得
+
+        Returns:
+            ResearchSearcher: 現在のバージョンの検索状態
+        """
+        return self._current
+
+    def search(self, query: str, **kwargs) -> pd.DataFrame:
+        """
+        現在のバージョンで検索（引数は ResearchSearcher.search と同じ）
+
+        Returns:
+            pd.DataFrame: 検索結果
+        """
+        return self.current().search(query, **kwargs)
+
+    def get_by_id(self, research_id: str) -> Optional[pd.Series]:
+        """
+        現在のバージョンで研究課題番号から研究課題を取得
+
+        Returns:
+            pd.Series: 研究課題データ、見つからない場合はNone
+        """
+        return self.current().get_by_id(research_id)
+
+    @property
+    def rebuilding(self) -> bool:
+        """バックグラウンドで作り直している最中かどうか"""
+        thread = self._rebuild_thread
+        return thread is not None and thread.is_alive()
+
+    def check(self) -> bool:
+        """
+        データファイルの変更を確認し、変更があれば作り直しを開始
+
+        Returns:
+            bool: 作り直しを開始した場合はTrue
+        """
+        try:
+            fingerprint = self.loader.fingerprint()
+        except FileNotFoundError as e:
+            # 更新中で一時的にファイルがない場合は古い状態を使い続ける
+            self.last_error = e
+            return False
+
+        with self._lock:
+            if fingerprint == self._fingerprint or self.rebuilding:
+                return False
+
+            self._rebuild_thread = threading.Thread(
+                target=self._rebuild,
+                args=(fingerprint,),
+                name="seedsearch-reload",
+                daemon=True,
+            )
+            self._rebuild_thread.start()
+            return True
+
+    def _rebuild(self, fingerprint: str) -> None:
+        """新しい状態を作成して入れ替える（バックグラウンドスレッドで実行）"""
+        try:
+            searcher = self._build_in_child()
+        except Exception as e:
+            # 作り直しに失敗した場合は古い状態を使い続ける
+            self.last_error = e
+            return
+
+        with self._lock:
+            self._current = searcher
+            self._fingerprint = fingerprint
+            self.version += 1
+            self.last_error = None
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """
+        作り直しが終わるまで待つ
+
+        Args:
+            timeout: 最大待ち時間（秒、Noneの場合は無制限）
+        """
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def start(self, interval: float = 5.0) -> None:
+        """
+        データファイルの変更を定期的に確認するスレッドを開始
+
+        Args:
+            interval: 確認間隔（秒）
+        """
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+
+        self._stop.clear()
+
+        def watch() -> None:
+            while not self._stop.wait(interval):
+                self.check()
+
+        self._watch_thread = threading.Thread(
+            target=watch, name="seedsearch-watch", daemon=True
+        )
+        self._watch_thread.start()
+
+    def stop(self) -> None:
+        """変更の確認を停止"""
+        self._stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
@@ -0,0 +1,447 @@
+"""メモリマップ形式の行ストア"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windowsでは使用中のファイルを削除できないため、ロックは不要
+    fcntl = None
+
+
+class RowStore:
+    """列ごとのUTF-8テキストとオフセット配列で研究課題データを保持するクラス
+
+    各列は以下の3ファイルで構成される:
+      - ``{i}.bin``: 全行の値を連結したUTF-8バイト列
+      - ``{i}.off.npy``: 各行の開始位置（int64、行数 + 1 要素）
+      - ``{i}.null.npy``: 欠損値フラグ（np.packbits で圧縮）
+
+    ファイルはメモリマップで開くため、表示する行・列だけがデコードされる。
+    検索用に列全体を読み込む場合（frame）は、列ごとに1回でまとめてデコードする。
+
+    開いている間は meta.json に共有ロックをかけ、全ファイルを最初に
+    メモリマップしておく。古い行ストアの削除（remove_if_unused）は
+    ロックを取れた場合だけ行うため、他のプロセスが使用中の行ストアは消さない。
+    """
+
+    # ディレクトリ形式のバージョン（形式を変えた場合は更新する）
+    FORMAT_VERSION = 1
+
+    # 研究課題番号の列名（find_id で二分探索する）
+    ID_COLUMN = "研究課題/領域番号"
+
+    META_FILE = "meta.json"
+    ID_ORDER_FILE = "id_order.npy"
+
+    def __init__(self, directory: Path):
+        """
+        Args:
+            directory: build() で作成したディレクトリ
+
+        Raises:
+            FileNotFoundError: ディレクトリまたはメタデータが存在しない場合
+            ValueError: ディレクトリ形式のバージョンが一致しない場合
+        """
+        self.directory = Path(directory)
+        meta_path = self.directory / self.META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(f"行ストアが見つかりません: {self.directory}")
+
+        # 使用中であることを示す共有ロック（閉じるまで保持する）
+        self._lock_file = open(meta_path, "rb")
+        if fcntl is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_SH)
+        meta = json.loads(self._lock_file.read().decode("utf-8"))
+
+        if meta.get("version") != self.FORMAT_VERSION:
+            self._lock_file.close()
+            raise ValueError(f"行ストアの形式が異なります: {self.directory}")
+
+        self.columns: List[str] = meta["columns"]
+        self.dtypes: List[str] = meta["dtypes"]
+        self.kinds: List[str] = meta["kinds"]
+        self._size: int = meta["rows"]
+        self.source: Optional[str] = meta.get("source")
+        self._column_index = {col: i for i, col in enumerate(self.columns)}
+
+        # 全ファイルを最初にメモリマップする（削除されても開いたマップは使い続けられる）
+        self._blobs: dict[int, np.ndarray] = {}
+        self._offsets: dict[int, np.ndarray] = {}
+        self._nulls: dict[int, np.ndarray] = {}
+        self._id_order: Optional[np.ndarray] = None
+        try:
+            for i in range(len(self.columns)):
+                self._open_column(i)
+            if self.ID_COLUMN in self._column_index:
+                self._id_order = np.load(self.directory / self.ID_ORDER_FILE, mmap_mode="r")
+        except OSError:
+            self._lock_file.close()
+            raise
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def build(
+        cls, data: pd.DataFrame, directory: Path, source: Optional[str] = None
+    ) -> "RowStore":
+        """
+        DataFrameから行ストアを作成
+
+        一時ディレクトリに書き出してから置き換えるため、
+        作成途中のストアが読み込まれることはない。
+
+        Args:
+            data: 研究課題データ
+            directory: 作成先のディレクトリ
+            source: 元データのファイルパス（古い行ストアの削除に使う）
+
+        Returns:
+            RowStore: 作成した行ストア
+        """
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=".rowstore-", dir=directory.parent))
+
+        try:
+            for i, col in enumerate(data.columns):
+                values = data[col]
+                nulls = values.isna().to_numpy()
+                encoded = [
+                    b"" if is_null else str(value).encode("utf-8")
+                    for value, is_null in zip(values, nulls)
+                ]
+
+                offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+                np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+                with open(tmp_dir / f"{i}.bin", "wb") as f:
+                    f.write(b"".join(encoded))
+                np.save(tmp_dir / f"{i}.off.npy", offsets)
+                np.save(tmp_dir / f"{i}.null.npy", np.packbits(nulls))
+
+            if cls.ID_COLUMN in data.columns:
+                ids = data[cls.ID_COLUMN].fillna("").astype(str).to_numpy(dtype=object)
+                np.save(tmp_dir / cls.ID_ORDER_FILE, np.argsort(ids, kind="stable"))
+
+            meta = {
+                "version": cls.FORMAT_VERSION,
+                "rows": len(data),
+                "columns": list(data.columns),
+                "dtypes": [str(dtype) for dtype in data.dtypes],
+                "kinds": [dtype.kind for dtype in data.dtypes],
+                "source": source,
+            }
+            with open(tmp_dir / cls.META_FILE, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+
+            cls._install(tmp_dir, directory)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        return cls(directory)
+
+    @classmethod
+    def _install(cls, tmp_dir: Path, directory: Path) -> None:
+        """作成した一時ディレクトリを作成先に置き換える"""
+        if directory.exists():
+            try:
+                cls(directory)
+            except (FileNotFoundError, ValueError):
+                # 形式が古い行ストアは退避してから削除する（開いているプロセスはマップを使い続ける）
+                stale_dir = Path(tempfile.mkdtemp(prefix=".stale-", dir=directory.parent))
+                os.replace(directory, stale_dir / directory.name)
+                shutil.rmtree(stale_dir, ignore_errors=True)
+            else:
+                # 他のプロセスが同時に作成し終えていた場合はそちらを使う
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return
+
+        try:
+            os.replace(tmp_dir, directory)
+        except OSError:
+            # 置き換えの直前に他のプロセスが作成した場合
+            if not (directory / cls.META_FILE).exists():
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @classmethod
+    def remove_if_unused(cls, directory: Path) -> bool:
+        """
+        どのプロセスも開いていない行ストアを削除
+
+        Args:
+            directory: 行ストアのディレクトリ
+
+        Returns:
+            bool: 削除した場合はTrue（使用中または存在しない場合はFalse）
+        """
+        directory = Path(directory)
+        try:
+            f = open(directory / cls.META_FILE, "rb")
+        except OSError:
+            return False
+
+        with f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # 他のプロセス（または同じプロセスの別の RowStore）が使用中
+                    return False
+            shutil.rmtree(directory, ignore_errors=True)
+        return True
+
+    def _open_column(self, i: int) -> None:
+        """列のファイルをメモリマップで開く"""
+        if i in self._offsets:
+            return
+
+        blob_path = self.directory / f"{i}.bin"
+        if blob_path.stat().st_size == 0:
+            # 長さ0のファイルはメモリマップできない
+            self._blobs[i] = np.empty(0, dtype=np.uint8)
+        else:
+            self._blobs[i] = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        self._offsets[i] = np.load(self.directory / f"{i}.off.npy", mmap_mode="r")
+        self._nulls[i] = np.load(self.directory / f"{i}.null.npy", mmap_mode="r")
+
+    def _value(self, i: int, pos: int) -> Optional[str]:
+        """i列目・pos行目の値をデコード（欠損値はNone）"""
+        if (self._nulls[i][pos >> 3] >> (7 - (pos & 7))) & 1:
+            return None
+
+        offsets = self._offsets[i]
+        return bytes(self._blobs[i][offsets[pos]:offsets[pos + 1]]).decode("utf-8")
+
+    def _restore_type(self, i: int, series: pd.Series) -> pd.Series:
+        """数値・真偽値の列は元の型に戻す（文字列の列はそのまま）"""
+        kind = self.kinds[i]
+        if kind in "iuf":
+            series = pd.to_numeric(series)
+            if not series.isna().any():
+                series = series.astype(self.dtypes[i])
+        elif kind == "b":
+            series = series.map({"True": True, "False": False})
+        return series
+
+    def _column_series(self, col: str, rows: Sequence[int]) -> pd.Series:
+        """指定した行だけをデコードして元の型に戻したSeriesを作成"""
+        i = self._column_index[col]
+        self._open_column(i)
+
+        series = pd.Series(
+            [self._value(i, pos) for pos in rows], index=rows, dtype=object, name=col
+        )
+        return self._restore_type(i, series)
+
+    def _full_column_series(self, col: str) -> pd.Series:
+        """列全体を1回でデコードして元の型に戻したSeriesを作成"""
+        i = self._column_index[col]
+        self._open_column(i)
+
+        blob = np.asarray(self._blobs[i])
+        offsets = np.asarray(self._offsets[i])
+        if self._size == 0:
+            values = []
+        elif not (blob == 0).any():
+            # 値の境界にNUL文字を挿入し、全体を1回でデコードしてから分割する
+            joined = np.insert(blob, offsets[1:-1], 0)
+            values = joined.tobytes().decode("utf-8").split("\x00")
+        else:
+            # 値にNUL文字が含まれる場合は1件ずつデコード
+            data = blob.tobytes()
+            values = [
+                data[start:end].decode("utf-8")
+                for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+            ]
+
+        column = np.array(values, dtype=object)
+        column[np.unpackbits(self._nulls[i], count=self._size).astype(bool)] = None
+        series = pd.Series(column, index=pd.RangeIndex(self._size), dtype=object, name=col)
+        return self._restore_type(i, series)
+
+    def take(
+        self, rows: Iterable[int], columns: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        指定した行・列だけをデコードしてDataFrameを作成
+
+        Args:
+            rows: 行番号
+            columns: 列名（Noneの場合は全列、存在しない列は無視）
+
+        Returns:
+            pd.DataFrame: 行番号をインデックスとするDataFrame
+        """
+        rows = [int(pos) for pos in rows]
+        if columns is None:
+            columns = self.columns
+        columns = [col for col in columns if col in self._column_index]
+
+        index = pd.Index(rows, dtype=np.int64)
+        if not columns:
+            return pd.DataFrame(index=index)
+
+        return pd.DataFrame(
+            {col: self._column_series(col, rows) for col in columns}, index=index
+        )
+
+    def frame(self, columns: Iterable[str]) -> pd.DataFrame:
+        """
+        指定した列だけを全行分デコードしてDataFrameを作成
+
+        Args:
+            columns: 列名（存在しない列は無視）
+
+        Returns:
+            pd.DataFrame: 行番号をインデックスとするDataFrame
+        """
+        columns = [col for col in columns if col in self._column_index]
+        return pd.DataFrame(
+            {col: self._full_column_series(col) for col in columns},
+            index=pd.RangeIndex(self._size),
+        )
+
+    def row(self, pos: int) -> pd.Series:
+        """
+        1行分の全列をデコード
+
+        Args:
+            pos: 行番号
+
+        Returns:
+            pd.Series: 研究課題データ（nameは行番号）
+        """
+        return self.take([pos]).iloc[0]
+
+    def find_id(self, research_id: str) -> Tuple[Optional[int], int]:
+        """
+        研究課題番号から行番号を二分探索
+
+        Args:
+            research_id: 研究課題/領域番号
+
+        Returns:
+            Tuple[int, int]: (行番号, 比較した行数)、見つからない場合の行番号はNone
+
+        Raises:
+            ValueError: 研究課題/領域番号の列が存在しない場合
+        """
+        if self.ID_COLUMN not in self._column_index:
+            raise ValueError("研究課題/領域番号の列が見つかりません")
+
+        i = self._column_index[self.ID_COLUMN]
+
+        lo, hi = 0, self._size
+        comparisons = 0
+        while lo < hi:
+            mid = (lo + hi) // 2
+            comparisons += 1
+            if (self._value(i, int(self._id_order[mid])) or "") < research_id:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < self._size:
+            pos = int(self._id_order[lo])
+            comparisons += 1
+            if (self._value(i, pos) or "") == research_id:
+                return pos, comparisons
+        return None, comparisons
+
+
+class MemoryStore:
+    """キャッシュに行ストアを作成できない場合に、読み込んだDataFrameで代用するクラス
+
+    RowStore と同じメソッドを持つが、データは全てメモリ上に保持する。
+    """
+
+    ID_COLUMN = RowStore.ID_COLUMN
+
+    # ファイルに保存しないためディレクトリはない
+    directory = None
+    source = None
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Args:
+            data: 研究課題データ
+        """
+        self._data = data.reset_index(drop=True)
+        self.columns: List[str] = list(self._data.columns)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def take(
+        self, rows: Iterable[int], columns: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        指定した行・列のDataFrameを取得
+
+        Args:
+            rows: 行番号
+            columns: 列名（Noneの場合は全列、存在しない列は無視）
+
+        Returns:
+            pd.DataFrame: 行番号をインデックスとするDataFrame
+        """
+        rows = [int(pos) for pos in rows]
+        if columns is None:
+            columns = self.columns
+        columns = [col for col in columns if col in self._data.columns]
+        return self._data.iloc[rows][columns]
+
+    def frame(self, columns: Iterable[str]) -> pd.DataFrame:
+        """
+        指定した列の全行を取得
+
+        Args:
+            columns: 列名（存在しない列は無視）
+
+        Returns:
+            pd.DataFrame: 行番号をインデックスとするDataFrame
+        """
+        return self._data[[col for col in columns if col in self._data.columns]]
+
+    def row(self, pos: int) -> pd.Series:
+        """
+        1行分の全列を取得
+
+        Args:
+            pos: 行番号
+
+        Returns:
+            pd.Series: 研究課題データ（nameは行番号）
+        """
+        return self._data.iloc[pos]
+
+    def find_id(self, research_id: str) -> Tuple[Optional[int], int]:
+        """
+        研究課題番号から行番号を取得（全行を走査）
+
+        Args:
+            research_id: 研究課題/領域番号
+
+        Returns:
+            Tuple[int, int]: (行番号, 比較した行数)、見つからない場合の行番号はNone
+
+        Raises:
+            ValueError: 研究課題/領域番号の列が存在しない場合
+        """
+        if self.ID_COLUMN not in self._data.columns:
+            raise ValueError("研究課題/領域番号の列が見つかりません")
+
+        matches = np.flatnonzero(self._data[self.ID_COLUMN].astype(str) == research_id)
+        pos = int(matches[0]) if matches.size else None
+        return pos, len(self._data)
@@ -1,7 +1,18 @@
 """検索ロジック"""
 
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
 import pandas as pd
-from typing import Optional
+from pathlib import Path
+from typing import List, Optional
+
+from .exact import ExactIndex
+from .metrics import QueryMetrics
+from .ranges import NumericIndex
+from .rowstore import RowStore
 
 
 class ResearchSearcher:
@@ -25,12 +36,175 @@ class ResearchSearcher:
         "researcher": ["研究代表者", "研究分担者"],
     }
 
-    def __init__(self, data: pd.DataFrame):
+    # 並べ替えに使用できるキー（NumericIndexの配列名との対応）
+    SORT_KEYS = {
+        "budget": "budget",
+    }
+
+    # 研究期間・総配分額による絞り込みに必要な列
+    RANGE_COLUMNS = [NumericIndex.PERIOD_COLUMN, NumericIndex.BUDGET_COLUMN]
+
+    # 行ストアのディレクトリ内でインデックスを保存するディレクトリ名
+    INDEX_DIR = "indexes"
+
+    def __init__(
+        self,
+        data: Optional[pd.DataFrame] = None,
+        store: Optional[RowStore] = None,
+        metrics: Optional[QueryMetrics] = None,
+    ):
         """
         Args:
-            data: 検索対象のDataFrame
+            data: 検索対象のDataFrame。storeを指定した場合は検索対象の列だけでよく、
+                インデックスは行ストアの行番号である必要がある。
+                get_by_id だけを使う場合は省略できる
+            store: 行ストア
+            metrics: 実行記録の保存先（Noneの場合は記録しない）
+
+        Raises:
+            ValueError: data と store の両方が指定されていない場合
         """
+        if data is None:
+            if store is None:
+                raise ValueError("data または store を指定してください")
+            # 列のない空のDataFrame（RangeIndexのため行数分のメモリは使わない）
+            data = pd.DataFrame(index=pd.RangeIndex(len(store)))
         self.data = data
+        self.store = store
+        self.metrics = metrics
+        self._exact_index: Optional[ExactIndex] = None
+        self._numeric_index: Optional[NumericIndex] = None
+
+    @staticmethod
+    def is_filtered(
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        min_budget: Optional[int] = None,
+        sort: Optional[str] = None,
+    ) -> bool:
+        """
+        研究期間・総配分額による絞り込みまたは並べ替えが指定されているかどうか
+
+        Returns:
+            bool: いずれかが指定されている場合はTrue
+        """
+        return sort is not None or any(
+            value is not None for value in (year_from, year_to, min_budget)
+        )
+
+    @classmethod
+    def columns_for(cls, field: Optional[str] = None, filtered: bool = False) -> List[str]:
+        """
+        検索に必要な列を取得
+
+        Args:
+            field: 検索対象フィールド（Noneの場合は全フィールド）
+            filtered: 研究期間・総配分額による絞り込み・並べ替えを行う場合はTrue
+
+        Returns:
+            List[str]: 行ストアから読み込む列名のリスト
+        """
+        if field is None:
+            fields = list(cls.SEARCH_FIELDS.values())
+        else:
+            fields = [cls.SEARCH_FIELDS[field]]
+
+        columns = list(dict.fromkeys(col for field_columns in fields for col in field_columns))
+        if filtered:
+            columns += cls.RANGE_COLUMNS
+        return columns
+
+    def build_indexes(self) -> None:
+        """
+        完全一致検索・範囲検索のインデックスを事前に作成
+
+        通常は初回の検索時に作成するが、常駐プロセスでデータを入れ替える前に
+        呼び出しておくと、入れ替え直後の検索が遅くならない
+        """
+        if self._exact_index is None:
+            self._exact_index = ExactIndex(self.data)
+        for columns in self.SEARCH_FIELDS.values():
+            for col in columns:
+                if col in self.data.columns:
+                    self._exact_index.postings(col)
+
+        if self._numeric_index is None and all(
+            col in self.data.columns for col in self.RANGE_COLUMNS
+        ):
+            self._numeric_index = NumericIndex(self.data)
+
+    def save_indexes(self, directory: Path) -> None:
+        """
+        作成済みのインデックスをディレクトリに保存
+
+        Args:
+            directory: 保存先のディレクトリ
+        """
+        directory = Path(directory)
+        if self._exact_index is not None:
+            self._exact_index.save(directory / "exact")
+        if self._numeric_index is not None:
+            self._numeric_index.save(directory / "range")
+
+    def load_indexes(self, directory: Path) -> None:
+        """
+        save_indexes() で保存したインデックスをメモリマップとして開く
+
+        保存されていないインデックスは通常どおり初回の検索時に作成する
+
+        Args:
+            directory: 保存先のディレクトリ（dataは保存時と同じ行順であること）
+        """
+        directory = Path(directory)
+        self._exact_index = ExactIndex.load(self.data, directory / "exact")
+        # 範囲検索のインデックスは列を読み込んでいなくても使える
+        numeric_index = NumericIndex.load(directory / "range")
+        if numeric_index is not None and numeric_index.size == len(self.data):
+            self._numeric_index = numeric_index
+
+    @classmethod
+    def prepare_indexes(
+        cls, store: RowStore, data: Optional[pd.DataFrame] = None
+    ) -> Optional[Path]:
+        """
+        行ストアのディレクトリにインデックスを保存（保存済みの場合は何もしない）
+
+        行ストアごとに1回だけ作成し、以降のプロセスは load_indexes() で開く
+
+        Args:
+            store: 行ストア
+            data: 行ストアから読み込み済みのDataFrame（全フィールドと範囲検索の列が
+                そろっていない場合は行ストアから読み込み直す）
+
+        Returns:
+            Path: インデックスのディレクトリ、保存できない場合はNone
+        """
+        if store.directory is None:
+            return None
+        index_dir = store.directory / cls.INDEX_DIR
+        if index_dir.exists():
+            return index_dir
+
+        # 一部の列だけのインデックスを保存すると、他の列は毎回作成することになる
+        columns = [col for col in cls.columns_for(filtered=True) if col in store.columns]
+        if data is None or not set(columns) <= set(data.columns):
+            data = store.frame(columns)
+        searcher = cls(data, store=store)
+        searcher.build_indexes()
+
+        # 作成途中のインデックスが読み込まれないよう、一時ディレクトリから置き換える
+        tmp_dir = None
+        try:
+            tmp_dir = Path(tempfile.mkdtemp(prefix=".indexes-", dir=store.directory))
+            searcher.save_indexes(tmp_dir)
+            os.replace(tmp_dir, index_dir)
+        except OSError:
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            # 他のプロセスが先に保存した場合はそちらを使う
+            if not index_dir.exists():
+                return None
+        return index_dir
 
     def search(
         self,
@@ -38,6 +212,10 @@ class ResearchSearcher:
         exact: bool = False,
         field: str = "all",
         operator: str = "and",
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        min_budget: Optional[int] = None,
+        sort: Optional[str] = None,
     ) -> pd.DataFrame:
         """
         キーワードで研究課題を検索（複数ワード対応）
@@ -47,13 +225,60 @@ class ResearchSearcher:
             exact: True の場合は完全一致検索、False の場合は部分一致検索
             field: 検索対象フィールド（"all", "title", "keyword", "overview", "researcher"）
             operator: 複数キーワードの結合方法（"and" または "or"、デフォルトは "and"）
+            year_from: この年度以降に実施中の研究に絞り込む
+            year_to: この年度までに開始した研究に絞り込む
+            min_budget: 総配分額（円）がこの金額以上の研究に絞り込む
+            sort: 並べ替えキー（"budget": 総配分額の降順）、Noneの場合は元の順序
 
         Returns:
             pd.DataFrame: 検索結果
 
         Raises:
-            ValueError: 無効なfieldまたはoperatorが指定された場合
+            ValueError: 無効なfield・operator・sortが指定された場合
         """
+        start = time.perf_counter()
+        stats = {"rows_scanned": 0, "indexes": [], "index_built": False}
+
+        results = self._search(
+            query, exact, field, operator, year_from, year_to, min_budget, sort, stats
+        )
+
+        if self.metrics is not None:
+            self.metrics.record(
+                "search",
+                (time.perf_counter() - start) * 1000,
+                query=query,
+                field=field,
+                operator=operator,
+                exact=exact,
+                keywords=len(query.split()),
+                filters=[
+                    name for name, value in (
+                        ("year_from", year_from),
+                        ("year_to", year_to),
+                        ("min_budget", min_budget),
+                        ("sort", sort),
+                    ) if value is not None
+                ],
+                hits=len(results),
+                **stats,
+            )
+
+        return results
+
+    def _search(
+        self,
+        query: str,
+        exact: bool,
+        field: str,
+        operator: str,
+        year_from: Optional[int],
+        year_to: Optional[int],
+        min_budget: Optional[int],
+        sort: Optional[str],
+        stats: dict,
+    ) -> pd.DataFrame:
+        """search の本体（statsに走査した行数・使用したインデックスを記録）"""
         if field not in self.SEARCH_FIELDS:
             raise ValueError(
                 f"無効な検索フィールドです: {field}\n"
@@ -66,6 +291,14 @@ class ResearchSearcher:
                 f"使用可能な演算子: 'and', 'or'"
             )
 
+        if sort is not None and sort not in self.SORT_KEYS:
+            raise ValueError(
+                f"無効な並べ替えキーです: {sort}\n"
+                f"使用可能なキー: {', '.join(self.SORT_KEYS.keys())}"
+            )
+
+        filtered = self.is_filtered(year_from, year_to, min_budget, sort)
+
         target_columns = self.SEARCH_FIELDS[field]
 
         # 検索対象の列が存在するか確認
@@ -81,8 +314,42 @@ class ResearchSearcher:
         keywords = [kw.strip() for kw in query.split() if kw.strip()]
 
         if not keywords:
-            # 空の検索クエリの場合は空のDataFrameを返す
-            return self.data.iloc[0:0]
+            if not filtered:
+                # 空の検索クエリの場合は空のDataFrameを返す
+                return self.data.iloc[0:0]
+            # 絞り込み条件だけが指定された場合は全件を対象にする
+            results = self.data
+        elif exact:
+            # 完全一致検索はハッシュインデックスの行番号配列を集合演算
+            results = self._search_exact(keywords, existing_columns, operator, stats)
+        else:
+            results = self._search_partial(keywords, existing_columns, operator, stats)
+
+        if filtered:
+            results = self._filter_ranges(
+                results, year_from, year_to, min_budget, sort, stats
+            )
+
+        return results
+
+    def _search_partial(
+        self, keywords: list[str], columns: list[str], operator: str, stats: dict
+    ) -> pd.DataFrame:
+        """
+        部分一致検索（大文字小文字を区別しない）
+
+        Args:
+            keywords: 検索キーワードのリスト
+            columns: 検索対象の列名
+            operator: 複数キーワードの結合方法（"and" または "or"）
+            stats: 走査した行数・使用したインデックスの記録先
+
+        Returns:
+            pd.DataFrame: 検索結果
+        """
+        # キーワードごとに全行を走査する
+        stats["rows_scanned"] += len(self.data) * len(keywords)
+        stats["indexes"].append("scan")
 
         # 複数キーワードのAND/OR検索
         if operator == "and":
@@ -92,15 +359,11 @@ class ResearchSearcher:
             for keyword in keywords:
                 keyword_mask = pd.Series([False] * len(self.data), index=self.data.index)
 
-                for col in existing_columns:
-                    if exact:
-                        # 完全一致検索
-                        keyword_mask |= self.data[col].astype(str) == keyword
-                    else:
-                        # 部分一致検索（大文字小文字を区別しない）
-                        keyword_mask |= self.data[col].astype(str).str.contains(
-                            keyword, case=False, na=False, regex=False
-                        )
+                for col in columns:
+                    # 部分一致検索（大文字小文字を区別しない）
+                    keyword_mask |= self.data[col].astype(str).str.contains(
+                        keyword, case=False, na=False, regex=False
+                    )
 
                 # すべてのキーワードを含む必要があるのでAND結合
                 mask &= keyword_mask
@@ -111,21 +374,96 @@ class ResearchSearcher:
             for keyword in keywords:
                 keyword_mask = pd.Series([False] * len(self.data), index=self.data.index)
 
-                for col in existing_columns:
-                    if exact:
-                        # 完全一致検索
-                        keyword_mask |= self.data[col].astype(str) == keyword
-                    else:
-                        # 部分一致検索（大文字小文字を区別しない）
-                        keyword_mask |= self.data[col].astype(str).str.contains(
-                            keyword, case=False, na=False, regex=False
-                        )
+                for col in columns:
+                    # 部分一致検索（大文字小文字を区別しない）
+                    keyword_mask |= self.data[col].astype(str).str.contains(
+                        keyword, case=False, na=False, regex=False
+                    )
 
                 # いずれかのキーワードにヒットしたらOR結合
                 mask |= keyword_mask
 
         return self.data[mask]
 
+    def _search_exact(
+        self, keywords: list[str], columns: list[str], operator: str, stats: dict
+    ) -> pd.DataFrame:
+        """
+        ハッシュインデックスを使った完全一致検索
+
+        キーワード列は " / " で分割した個々のキーワードと照合する
+
+        Args:
+            keywords: 検索キーワードのリスト
+            columns: 検索対象の列名
+            operator: 複数キーワードの結合方法（"and" または "or"）
+            stats: 走査した行数・使用したインデックスの記録先
+
+        Returns:
+            pd.DataFrame: 検索結果
+        """
+        if self._exact_index is None:
+            self._exact_index = ExactIndex(self.data)
+        if not all(self._exact_index.is_built(col) for col in columns):
+            stats["index_built"] = True
+        stats["indexes"].append("hash")
+
+        def lookup(keyword: str) -> np.ndarray:
+            found = self._exact_index.lookup(keyword, columns)
+            stats["rows_scanned"] += found.size
+            return found
+
+        positions = lookup(keywords[0])
+        for keyword in keywords[1:]:
+            if operator == "and":
+                # AND検索: 行番号配列の積集合
+                if positions.size == 0:
+                    break
+                positions = np.intersect1d(positions, lookup(keyword))
+            else:
+                # OR検索: 行番号配列の和集合
+                positions = np.union1d(positions, lookup(keyword))
+
+        return self.data.iloc[positions]
+
+    def _filter_ranges(
+        self,
+        results: pd.DataFrame,
+        year_from: Optional[int],
+        year_to: Optional[int],
+        min_budget: Optional[int],
+        sort: Optional[str],
+        stats: dict,
+    ) -> pd.DataFrame:
+        """
+        研究期間・総配分額のソート済みインデックスで検索結果を絞り込み・並べ替え
+
+        Args:
+            results: キーワード検索の結果（self.dataの部分集合）
+            year_from: この年度以降に実施中の研究に絞り込む
+            year_to: この年度までに開始した研究に絞り込む
+            min_budget: 総配分額（円）がこの金額以上の研究に絞り込む
+            sort: 並べ替えキー
+            stats: 走査した行数・使用したインデックスの記録先
+
+        Returns:
+            pd.DataFrame: 絞り込み・並べ替え後の検索結果
+        """
+        if self._numeric_index is None:
+            self._numeric_index = NumericIndex(self.data)
+            stats["index_built"] = True
+        stats["indexes"].append("range")
+        stats["rows_scanned"] += len(results)
+
+        positions = self.data.index.get_indexer(results.index)
+        mask = self._numeric_index.filter_mask(year_from, year_to, min_budget)
+        positions = positions[mask[positions]]
+
+        if sort is not None:
+            positions = self._numeric_index.sort_positions(positions, self.SORT_KEYS[sort])
+
+        return self.data.iloc[positions]
+
     def get_by_id(self, research_id: str) -> Optional[pd.Series]:
         """
         研究課題番号で特定の研究課題を取得
@@ -136,9 +474,46 @@ class ResearchSearcher:
         Returns:
             pd.Series: 研究課題データ、見つからない場合はNone
         """
+        start = time.perf_counter()
+        stats = {"rows_scanned": 0, "indexes": []}
+        result = self._get_by_id(research_id, stats)
+
+        if self.metrics is not None:
+            self.metrics.record(
+                "get_by_id",
+                (time.perf_counter() - start) * 1000,
+                query=research_id,
+                hits=0 if result is None else 1,
+                **stats,
+            )
+
+        return result
+
+    def _get_by_id(self, research_id: str, stats: dict) -> Optional[pd.Series]:
+        """
+        get_by_id の本体
+
+        Args:
+            research_id: 研究課題/領域番号
+            stats: 走査した行数・使用したインデックスの記録先
+
+        Returns:
+            pd.Series: 研究課題データ、見つからない場合はNone
+        """
+        if self.store is not None:
+            # 行ストアでは二分探索した1行だけをデコード
+            pos, comparisons = self.store.find_id(research_id)
+            stats["rows_scanned"] = comparisons
+            # キャッシュに書き込めずメモリ上のデータで代用している場合は全行を走査する
+            in_memory = self.store.directory is None
+            stats["indexes"].append("scan" if in_memory else "rowstore")
+            return None if pos is None else self.store.row(pos)
+
         if "研究課題/領域番号" not in self.data.columns:
             raise ValueError("研究課題/領域番号の列が見つかりません")
 
+        stats["rows_scanned"] = len(self.data)
+        stats["indexes"].append("scan")
         result = self.data[self.data["研究課題/領域番号"] == research_id]
 
         if result.empty: